@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from analytics.metrics import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily task metrics rollup from the task table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Only rebuild this organization.')
+
+    def handle(self, *args, **options):
+        count = rebuild(options['org'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} daily task metric rows.'))
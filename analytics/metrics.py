@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import Task
+from .models import DailyTaskMetric
+
+TASK_STATE_FIELDS = ('organization_id', 'project_id', 'created_at', 'completed_at')
+
+
+def task_state(task):
+    """The fields of ``task`` the rollup depends on, or None if any is not loaded."""
+    values = tuple(task.__dict__.get(name) for name in TASK_STATE_FIELDS)
+    if values[0] is None or values[1] is None or values[2] is None:
+        return None
+    return values
+
+
+def contributions(state, assignee_ids=(), totals=True):
+    """Counter of ``(org, project, date, assignee, metric) -> count`` for one task."""
+    counts = Counter()
+    if state is None:
+        return counts
+    org_id, project_id, created_at, completed_at = state
+    created = timezone.localdate(created_at)
+    completed = timezone.localdate(completed_at) if completed_at else None
+    for assignee_id in ([None] if totals else []) + list(assignee_ids):
+        counts[(org_id, project_id, created, assignee_id, 'created_count')] += 1
+        if completed:
+            counts[(org_id, project_id, completed, assignee_id, 'completed_count')] += 1
+    return counts
+
+
+def contributions_for_tasks(task_ids):
+    """Current contributions of the given tasks, read with two queries."""
+    counts = Counter()
+    if not task_ids:
+        return counts
+    assignees = {}
+    for task_id, user_id in Task.assignees.through.objects.filter(task_id__in=task_ids).values_list('task_id', Task.assignees.field.m2m_reverse_field_name()):
+        assignees.setdefault(task_id, []).append(user_id)
+    for row in Task.objects.filter(id__in=task_ids).values('id', *TASK_STATE_FIELDS):
+        state = tuple(row[name] for name in TASK_STATE_FIELDS)
+        counts.update(contributions(state, assignees.get(row['id'], ())))
+    return counts
+
+
+def apply_delta(delta):
+    """Add a Counter of contributions (positive or negative) to the rollup table."""
+    rows = {}
+    for (org_id, project_id, date, assignee_id, metric), value in delta.items():
+        if value:
+            rows.setdefault((org_id, project_id, date, assignee_id), {})[metric] = value
+
+    with transaction.atomic():
+        for (org_id, project_id, date, assignee_id), changes in rows.items():
+            key = {'organization_id': org_id, 'project_id': project_id, 'date': date, 'assignee_id': assignee_id}
+            increment = {metric: F(metric) + value for metric, value in changes.items()}
+            if DailyTaskMetric.objects.filter(**key).update(**increment):
+                continue
+            # Negative counts are kept too, so the row still adds up once the
+            # contributions it is missing arrive.
+            try:
+                with transaction.atomic():
+                    DailyTaskMetric.objects.create(**key, **changes)
+            except IntegrityError:
+                # Another writer created the row since the update missed it.
+                DailyTaskMetric.objects.filter(**key).update(**increment)
+
+
+def rebuild(organization_id=None):
+    """Recompute the rollup from the task table, for one organization or all of them."""
+    tasks = Task.objects.all()
+    if organization_id is not None:
+        tasks = tasks.filter(organization_id=organization_id)
+    through = Task.assignees.through.objects.filter(task__in=tasks)
+    user_field = Task.assignees.field.m2m_reverse_field_name()
+
+    counts = Counter()
+    for queryset, prefix, assignee in (
+        (tasks, '', None),
+        (through, 'task__', user_field),
+    ):
+        for metric, date_field, extra in (
+            ('created_count', 'created_at', {}),
+            ('completed_count', 'completed_at', {f'{prefix}completed_at__isnull': False}),
+        ):
+            keys = [f'{prefix}organization_id', f'{prefix}project_id', 'day'] + ([assignee] if assignee else [])
+            rows = queryset.filter(**extra).annotate(day=TruncDate(f'{prefix}{date_field}')).values_list(*keys).annotate(count=Count('pk')).order_by()
+            for row in rows:
+                org_id, project_id, day = row[:3]
+                assignee_id = row[3] if assignee else None
+                counts[(org_id, project_id, day, assignee_id, metric)] += row[-1]
+
+    rows = {}
+    for (org_id, project_id, day, assignee_id, metric), value in counts.items():
+        row = rows.setdefault((org_id, project_id, day, assignee_id), DailyTaskMetric(
+            organization_id=org_id, project_id=project_id, date=day, assignee_id=assignee_id
+        ))
+        setattr(row, metric, value)
+
+    with transaction.atomic():
+        existing = DailyTaskMetric.objects.all()
+        if organization_id is not None:
+            existing = existing.filter(organization_id=organization_id)
+        existing.delete()
+        DailyTaskMetric.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
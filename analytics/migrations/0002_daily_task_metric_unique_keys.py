@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    # Rows of one key were allowed before; fold each key into its first row.
+    DailyTaskMetric = apps.get_model('analytics', 'DailyTaskMetric')
+    keys = ('organization_id', 'project_id', 'date', 'assignee_id')
+    duplicates = DailyTaskMetric.objects.values(*keys).annotate(
+        first=Min('id'), rows=Count('id'), created=Sum('created_count'), completed=Sum('completed_count'),
+    ).filter(rows__gt=1).order_by()
+    for row in duplicates:
+        key = {name: row[name] for name in keys}
+        DailyTaskMetric.objects.filter(**key).exclude(id=row['first']).delete()
+        DailyTaskMetric.objects.filter(id=row['first']).update(created_count=row['created'], completed_count=row['completed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('core', '0015_task_org_completed_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailytaskmetric',
+            constraint=models.UniqueConstraint(condition=models.Q(('assignee__isnull', False)), fields=('organization', 'project', 'date', 'assignee'), name='metric_assignee_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytaskmetric',
+            constraint=models.UniqueConstraint(condition=models.Q(('assignee__isnull', True)), fields=('organization', 'project', 'date'), name='metric_total_key'),
+        ),
+    ]
@@ -1,3 +1,40 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from core.models import Organization, Project
+
+
+class DailyTaskMetric(models.Model):
+    """Task counts per organization, project and day, kept up to date by analytics.signals.
+
+    Rows without an assignee count every task once. Rows with an assignee count
+    the tasks assigned to that user. ``created_count`` is bucketed by the task's
+    creation date and ``completed_count`` by its completion date. There is one
+    row per key; a NULL assignee is its own key, so the totals get a separate
+    constraint (NULLs are distinct in a plain unique index).
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='daily_task_metrics')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_task_metrics')
+    date = models.DateField()
+    assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_task_metrics')
+    created_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organization', 'date', 'project'], name='metric_org_date_idx'),
+            models.Index(fields=['organization', 'assignee', 'project'], name='metric_org_assignee_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organization', 'project', 'date', 'assignee'], condition=models.Q(assignee__isnull=False),
+                name='metric_assignee_key',
+            ),
+            models.UniqueConstraint(
+                fields=['organization', 'project', 'date'], condition=models.Q(assignee__isnull=True),
+                name='metric_total_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.organization_id}/{self.project_id} {self.date} {self.assignee_id}"
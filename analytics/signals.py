@@ -0,0 +1,110 @@
+from collections import Counter
+
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import Board, Column, Organization, Project, Task
+from core.signals import deletion_batch, tasks_bulk_changing
+from .metrics import TASK_STATE_FIELDS, apply_delta, contributions, contributions_for_tasks, task_state
+
+
+def _delta(new, old):
+    delta = Counter(new)
+    delta.subtract(old)
+    return delta
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    instance._metrics_state = task_state(instance)
+
+
+@receiver(pre_save, sender=Task)
+def load_previous_task_state(sender, instance, **kwargs):
+    if instance.pk and not instance._state.adding and instance._metrics_state is None:
+        row = Task.objects.filter(pk=instance.pk).values_list(*TASK_STATE_FIELDS).first()
+        instance._metrics_state = tuple(row) if row else None
+
+
+@receiver(post_save, sender=Task)
+def update_metrics_on_save(sender, instance, created, **kwargs):
+    old, new = (None if created else instance._metrics_state), task_state(instance)
+    if old != new:
+        assignees = [] if created else list(instance.assignees.values_list('id', flat=True))
+        apply_delta(_delta(contributions(new, assignees), contributions(old, assignees)))
+    instance._metrics_state = new
+
+
+# The lookup from a task to each kind of object whose delete() removes tasks.
+DELETED_TASK_LOOKUPS = {Task: 'pk', Column: 'column', Board: 'column__board'}
+
+
+def _deleted_task_ids(origin):
+    lookup = DELETED_TASK_LOOKUPS.get(origin.model if isinstance(origin, QuerySet) else type(origin))
+    if lookup is None:
+        return None
+    if isinstance(origin, QuerySet):
+        return list(Task.objects.filter(**{f'{lookup}__in': origin}).values_list('pk', flat=True))
+    return list(Task.objects.filter(**{lookup: origin.pk}).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Task)
+def collect_metrics_on_delete(sender, instance, origin=None, **kwargs):
+    # The rollup rows of a deleted organization or project go with it.
+    if isinstance(origin, (Organization, Project)) or getattr(origin, 'model', None) in (Organization, Project):
+        return
+    # A cascade's contributions are read once, for all of its tasks, on the first one.
+    batch = deletion_batch(instance, origin)
+    if '_metrics_removed' not in batch.__dict__:
+        task_ids = _deleted_task_ids(batch)
+        if task_ids is None:
+            batch, task_ids = instance, [instance.pk]
+        batch._metrics_removed = contributions_for_tasks(task_ids)
+    instance._metrics_batch = batch
+
+
+@receiver(post_delete, sender=Task)
+def update_metrics_on_delete(sender, instance, **kwargs):
+    batch = instance.__dict__.pop('_metrics_batch', None)
+    removed = batch.__dict__.pop('_metrics_removed', None) if batch is not None else None
+    if removed:
+        apply_delta(_delta(Counter(), removed))
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def update_metrics_on_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            instance._metrics_cleared = list(instance.assigned_tasks.values_list('id', flat=True))
+        else:
+            instance._metrics_cleared = list(instance.assignees.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    ids = pk_set if action != 'post_clear' else getattr(instance, '_metrics_cleared', [])
+    if not ids:
+        return
+
+    if reverse:
+        # user.assigned_tasks.add(...): ids are task ids.
+        states = Task.objects.filter(pk__in=ids).values_list(*TASK_STATE_FIELDS)
+        counts = Counter()
+        for state in states:
+            counts.update(contributions(tuple(state), [instance.pk], totals=False))
+    else:
+        counts = contributions(task_state(instance), ids, totals=False)
+
+    if action == 'post_add':
+        apply_delta(counts)
+    else:
+        apply_delta(_delta(Counter(), counts))
+
+
+@receiver(tasks_bulk_changing, sender=Task)
+def update_metrics_on_bulk_change(sender, task_ids, **kwargs):
+    before = contributions_for_tasks(task_ids)
+
+    def after(final_ids):
+        apply_delta(_delta(contributions_for_tasks(final_ids), before))
+    return after
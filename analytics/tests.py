@@ -1,3 +1,198 @@
-from django.test import TestCase
+from collections import Counter
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import *
+from core.tests import OrganizationAPITestCase
+from .metrics import apply_delta, rebuild
+from .models import DailyTaskMetric
+
+
+def snapshot():
+    rows = {}
+    for row in DailyTaskMetric.objects.values('organization_id', 'project_id', 'date', 'assignee_id', 'created_count', 'completed_count'):
+        key = (row['organization_id'], row['project_id'], row['date'], row['assignee_id'])
+        created, completed = rows.get(key, (0, 0))
+        rows[key] = (created + row['created_count'], completed + row['completed_count'])
+    return {key: value for key, value in rows.items() if value != (0, 0)}
+
+
+class DailyTaskMetricTests(OrganizationAPITestCase):
+
+    def test_incremental_updates_match_rebuild(self):
+        other = CustomUser.objects.create_user('other')
+        tasks = self.create_tasks(3)
+        tasks[0].assignees.add(other)
+        tasks[1].completed_at = timezone.now()
+        tasks[1].save()
+        tasks[2].assignees.remove(self.user)
+        other.assigned_tasks.add(tasks[2])
+        tasks[0].delete()
+
+        second_project = Project.objects.create(name='Ops', organization=self.organization)
+        second_board = Board.objects.create(name='Ops', project=second_project, organization=self.organization)
+        self.column.board = second_board
+        self.column.save()
+
+        self.client.post('/api/tasks/bulk/', [
+            {'title': 'Bulk', 'column': self.column.id, 'assignees': [other.id], 'completed_at': timezone.now().isoformat()},
+            {'id': tasks[1].id, 'assignees': [other.id]},
+        ], format='json')
+
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+        # Three tasks, each assigned to one user after the bulk update.
+        self.assertEqual(sum(created for created, _ in incremental.values()), 6)
+
+    def test_cascaded_deletes_update_the_rollup_once(self):
+        def delete_board(count):
+            board = Board.objects.create(name='Doomed', project=self.project, organization=self.organization)
+            column = Column.objects.create(name='To do', board=board)
+            for i in range(count):
+                Task.objects.create(title=f'Task {i}', column=column).assignees.add(self.user)
+            with CaptureQueriesContext(connection) as context:
+                board.delete()
+            return [q for q in context.captured_queries if 'dailytaskmetric' in q['sql'] or 'task_assignees' in q['sql']]
+
+        tasks = self.create_tasks(3)
+        self.assertEqual(len(delete_board(1)), len(delete_board(5)))
+        Task.objects.filter(pk__in=[tasks[0].pk, tasks[1].pk]).delete()
+        doomed = Project.objects.create(name='Doomed', organization=self.organization)
+        board = Board.objects.create(name='Doomed', project=doomed, organization=self.organization)
+        Task.objects.create(title='Doomed', column=Column.objects.create(name='To do', board=board))
+        doomed.delete()
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+
+    def test_one_row_per_key_and_deltas_are_not_clamped(self):
+        key = {'organization': self.organization, 'project': self.project, 'date': date(2026, 1, 1)}
+        DailyTaskMetric.objects.create(**key, created_count=1)
+        for assignee in (None, self.user):
+            DailyTaskMetric.objects.create(**{**key, 'date': date(2026, 1, 2)}, assignee=assignee)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                DailyTaskMetric.objects.create(**{**key, 'date': date(2026, 1, 2)}, assignee=assignee)
+
+        org, project = self.organization.id, self.project.id
+        apply_delta(Counter({(org, project, date(2026, 1, 1), None, 'created_count'): 1}))
+        apply_delta(Counter({
+            (org, project, date(2026, 1, 3), None, 'created_count'): 1,
+            (org, project, date(2026, 1, 3), None, 'completed_count'): -1,
+        }))
+        rows = DailyTaskMetric.objects.filter(assignee=None).order_by('date').values_list('created_count', 'completed_count')
+        self.assertEqual(list(rows), [(2, 0), (0, 0), (1, -1)])
+
+    def test_racing_writers_add_to_the_same_row(self):
+        org, project, day = self.organization.id, self.project.id, date(2026, 1, 1)
+        rows, missed = DailyTaskMetric.objects.filter, []
+
+        def created_elsewhere_after_the_update(**key):
+            if missed:
+                return rows(**key)
+            # Another writer inserts the row after this one's update found none.
+            missed.append(key)
+            DailyTaskMetric.objects.create(organization_id=org, project_id=project, date=day, created_count=1)
+            return DailyTaskMetric.objects.none()
+
+        with mock.patch.object(DailyTaskMetric.objects, 'filter', side_effect=created_elsewhere_after_the_update):
+            apply_delta(Counter({(org, project, day, None, 'created_count'): 1}))
+        self.assertEqual(list(DailyTaskMetric.objects.values_list('created_count', flat=True)), [2])
+
+    def test_analytics_views_read_rollup(self):
+        tasks = self.create_tasks(3)
+        for task in tasks[:2]:
+            task.completed_at = timezone.now()
+            task.save()
+
+        query = {'org_id': self.organization.id}
+        response = self.client.get('/analytics/tasks-completed/', query)
+        self.assertEqual(response.data, [{'date': timezone.localdate().isoformat(), 'completed_tasks_count': 2}])
+
+        response = self.client.get('/analytics/member-productivity/', query)
+        self.assertEqual(response.data, [{
+            'user_id': self.user.id, 'user_name': 'owner', 'completed_tasks_count': 2, 'pending_tasks_count': 1,
+        }])
+
+        response = self.client.get('/analytics/burndown-chart/', query)
+        self.assertEqual(response.data[-1]['remaining_tasks_count'], 1)
+
+    def test_burndown_fills_the_range_from_an_opening_balance(self):
+        today = timezone.localdate()
+        tasks = self.create_tasks(4)
+
+        def ago(days):
+            return timezone.now() - timedelta(days=days)
+
+        Task.objects.filter(pk__in=[task.pk for task in tasks[:3]]).update(created_at=ago(10))
+        Task.objects.filter(pk=tasks[0].pk).update(completed_at=ago(5))
+        Task.objects.filter(pk=tasks[1].pk).update(completed_at=ago(8))
+        rebuild()
+
+        query = {'org_id': self.organization.id, 'start_date': (today - timedelta(days=7)).isoformat()}
+        response = self.client.get('/analytics/burndown-chart/', query)
+        self.assertEqual(
+            [(row['date'], row['remaining_tasks_count']) for row in response.data],
+            [((today - timedelta(days=days)).isoformat(), count) for days, count in (
+                (7, 2), (6, 2), (5, 1), (4, 1), (3, 1), (2, 1), (1, 1), (0, 2),
+            )],
+        )
+        query['end_date'] = (today - timedelta(days=6)).isoformat()
+        self.assertEqual(len(self.client.get('/analytics/burndown-chart/', query).data), 2)
+
+        for bad in (
+            {'start_date': 'yesterday'}, {'end_date': '2024-02-30'},
+            {'start_date': today.isoformat(), 'end_date': (today - timedelta(days=1)).isoformat()},
+            {'start_date': (today - timedelta(days=400)).isoformat()},
+        ):
+            response = self.client.get('/analytics/burndown-chart/', {'org_id': self.organization.id, **bad})
+            self.assertEqual(response.status_code, 400, bad)
+
+    def test_missed_deadlines_per_due_date(self):
+        today = timezone.localdate()
+        tasks = self.create_tasks(5)
+        due = [today - timedelta(days=3), today - timedelta(days=3), today - timedelta(days=1), today - timedelta(days=1), today]
+        for task, due_date in zip(tasks, due):
+            task.due_date = due_date
+        tasks[3].completed_at = timezone.now()
+        Task.objects.bulk_update(tasks, ['due_date', 'completed_at'])
+
+        response = self.client.get('/analytics/missed-deadlines/', {'org_id': self.organization.id})
+        self.assertEqual(response.data, [
+            {'date': due[0].isoformat(), 'missed_tasks_count': 2},
+            {'date': due[2].isoformat(), 'missed_tasks_count': 1},
+        ])
+
+
+class AnalyticsCacheTests(OrganizationAPITestCase):
+
+    def test_etag_and_invalidation(self):
+        task = self.create_tasks(1)[0]
+        url = '/analytics/burndown-chart/'
+        query = {'org_id': self.organization.id}
+        response = self.client.get(url, query)
+        etag = response['ETag']
+        self.assertEqual(response.data[-1]['remaining_tasks_count'], 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, query, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        task.completed_at = timezone.now()
+        task.save()
+        response = self.client.get(url, query, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[-1]['remaining_tasks_count'], 0)
+
+    def test_non_member_is_not_served_from_cache(self):
+        self.create_tasks(1)
+        query = {'org_id': self.organization.id}
+        self.client.get('/analytics/burndown-chart/', query)
+        self.client.force_authenticate(CustomUser.objects.create_user('stranger'))
+        response = self.client.get('/analytics/burndown-chart/', query)
+        self.assertEqual(response.status_code, 403)
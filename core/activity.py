@@ -0,0 +1,137 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+
+from .models import ActivityLog, Project, Task
+from .sqlite import write_transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _option(name, default):
+    return getattr(settings, 'ACTIVITY_LOG', {}).get(name, default)
+
+
+class ActivityLogBuffer:
+    """In-process queue of ActivityLog rows written with ``bulk_create``.
+
+    Rows are flushed when ``MAX_BATCH`` entries are queued or ``FLUSH_INTERVAL``
+    seconds after the first queued entry, whichever comes first, always on a
+    background thread so a failed write never reaches a request. Entries made
+    inside a transaction only join the queue once it commits, so a rolled back
+    request leaves no audit rows behind.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, entry):
+        if not _option('BUFFERED', True):
+            write_transaction(entry.save)()
+            return
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._enqueue([entry]))
+        else:
+            self._enqueue([entry])
+
+    def _enqueue(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+            full = len(self._entries) >= _option('MAX_BATCH', 100)
+            if full or self._timer is None:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(0 if full else _option('FLUSH_INTERVAL', 1.0), self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            entries, self._entries = self._entries, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not entries:
+            return 0
+        try:
+            return self._write(entries)
+        except Exception:
+            # Keep the rows for the next flush rather than losing the audit trail.
+            self._requeue(entries)
+            raise
+
+    def _write(self, entries):
+        try:
+            write_transaction(ActivityLog.objects.bulk_create)(entries, batch_size=500)
+            return len(entries)
+        except IntegrityError:
+            pass
+        # A task or project was deleted while its entries were queued; write the rest.
+        live = _live_entries(entries)
+        if len(live) < len(entries):
+            logger.warning('Dropped %d buffered activity log entries of deleted objects.', len(entries) - len(live))
+        try:
+            write_transaction(ActivityLog.objects.bulk_create)(live, batch_size=500)
+            return len(live)
+        except IntegrityError:
+            # Another delete raced the check; fall back to one row at a time.
+            written = 0
+            for entry in live:
+                try:
+                    write_transaction(entry.save)()
+                    written += 1
+                except IntegrityError:
+                    logger.warning('Dropped activity log entry %r of a deleted object.', entry.description)
+            return written
+
+    def _requeue(self, entries):
+        with self._lock:
+            self._entries[:0] = entries
+            overflow = len(self._entries) - _option('MAX_PENDING', 10000)
+            if overflow > 0:
+                logger.error('Activity log buffer is full; dropped the %d oldest entries.', overflow)
+                del self._entries[:overflow]
+            if self._timer is None:
+                self._timer = threading.Timer(_option('FLUSH_INTERVAL', 1.0), self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush buffered activity log entries; they will be retried.')
+        finally:
+            connection.close()
+
+
+def _live_entries(entries):
+    """``entries`` without those whose task or project is gone; deleted users are unset like SET_NULL would."""
+    def existing(model, ids):
+        ids = {pk for pk in ids if pk is not None}
+        return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+
+    tasks = existing(Task, (entry.task_id for entry in entries))
+    projects = existing(Project, (entry.project_id for entry in entries))
+    users = existing(get_user_model(), (entry.user_id for entry in entries))
+    live = []
+    for entry in entries:
+        if (entry.task_id is None or entry.task_id in tasks) and (entry.project_id is None or entry.project_id in projects):
+            if entry.user_id not in users:
+                entry.user_id = None
+            live.append(entry)
+    return live
+
+
+activity_log_buffer = ActivityLogBuffer()
+atexit.register(activity_log_buffer.flush)
+
+
+def flush_activity_log():
+    return activity_log_buffer.flush()
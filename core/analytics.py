@@ -1,57 +1,151 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
+from django.db.models import Count, DateField, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils.dateparse import parse_date
 from django.utils.timezone import now
 from datetime import timedelta
+from analytics.models import DailyTaskMetric
 from core.models import Task, Membership  
 from .serializers import *
-
-
-def is_member_of_organization(user, org_id):
-    return Membership.objects.filter(user=user, organization_id=org_id).exists()
-
-
-class TasksCompletedPerDay(APIView):
+from .replicas import ReplicaReadMixin
+from .utils import get_role
+from .tagged_cache import cached_analytics
+
+
+def is_member_of_organization(user, org_id, request=None):
+    return get_role(user, org_id, request=request) is not None
+
+
+def task_metrics(org_id, project_id=None):
+    """Rollup rows for an organization, optionally narrowed to one project."""
+    metrics = DailyTaskMetric.objects.filter(organization_id=org_id)
+    if project_id:
+        metrics = metrics.filter(project_id=project_id)
+    return metrics
+
+
+# Longest range a dashboard may ask for, in days.
+MAX_RANGE_DAYS = 366
+
+
+def _parse_day(value, name):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ParseError(f"{name} must be a date in YYYY-MM-DD format.")
+    return day
+
+
+def date_range(params, default_days):
+    """``start_date`` and ``end_date`` from the query, by default the ``default_days`` days up to today."""
+    end_date = _parse_day(params["end_date"], "end_date") if params.get("end_date") else now().date()
+    if params.get("start_date"):
+        start_date = _parse_day(params["start_date"], "start_date")
+    else:
+        start_date = end_date - timedelta(days=default_days)
+    if start_date > end_date:
+        raise ParseError("start_date must not be after end_date.")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise ParseError(f"The date range may span at most {MAX_RANGE_DAYS} days.")
+    return start_date, end_date
+
+
+# Queries shared by these views and their async versions in core.async_views.
+
+def completed_per_day(org_id, project_id, start_date, end_date):
+    return task_metrics(org_id, project_id).filter(
+        assignee__isnull=True,
+        date__range=(start_date, end_date),
+    ).values("date").annotate(
+        completed_tasks_count=Sum("completed_count")
+    ).filter(completed_tasks_count__gt=0).order_by("date")
+
+
+def member_productivity(org_id, project_id):
+    return task_metrics(org_id, project_id).filter(assignee__isnull=False).values(
+        user_id=F("assignee_id"), user_name=F("assignee__username")
+    ).annotate(
+        completed_tasks_count=Sum("completed_count"),
+        assigned_tasks_count=Sum("created_count"),
+    ).order_by("-completed_tasks_count", "user_id")
+
+
+def with_pending_counts(members):
+    for member in members:
+        member["pending_tasks_count"] = member["assigned_tasks_count"] - member["completed_tasks_count"]
+    return members
+
+
+def missed_deadlines_per_day(org_id, project_id):
+    """Open tasks past their due date, counted per due date."""
+    tasks = Task.objects.filter(
+        organization_id=org_id,
+        due_date__lt=now().date(),
+        completed_at__isnull=True
+    )
+    if project_id:
+        tasks = tasks.filter(project_id=project_id)
+    return tasks.values(date=F("due_date")).annotate(missed_tasks_count=Count("id")).order_by("date")
+
+
+def burndown_days(org_id, project_id, start_date, end_date):
+    """Tasks created and completed per day up to ``end_date``, in one grouped query.
+
+    Days before ``start_date`` collapse into a single row dated the day before
+    it, which carries the opening balance.
+    """
+    opening = Value(start_date - timedelta(days=1), output_field=DateField())
+    return task_metrics(org_id, project_id).filter(assignee__isnull=True, date__lte=end_date).values(
+        day=Greatest("date", opening)
+    ).annotate(
+        created=Sum("created_count"),
+        completed=Sum("completed_count"),
+    ).order_by("day")
+
+
+def remaining_series(days, start_date, end_date):
+    """Open tasks at the end of every day from ``start_date`` to ``end_date``, days without changes included."""
+    changes = {day["day"]: day["created"] - day["completed"] for day in days}
+    remaining = changes.pop(start_date - timedelta(days=1), 0)
+    series = []
+    for offset in range((end_date - start_date).days + 1):
+        date = start_date + timedelta(days=offset)
+        remaining += changes.get(date, 0)
+        series.append({"date": date, "remaining_tasks_count": remaining})
+    return series
+
+
+class TasksCompletedPerDay(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    @cached_analytics
     def get(self, request):
         user = request.user
         org_id = request.query_params.get("org_id")
         project_id = request.query_params.get("project_id")
-        start_date = request.query_params.get("start_date")
-        end_date = request.query_params.get("end_date")
 
         if not org_id:
             return Response({"detail": "Missing required parameter: org_id"}, status=400)
 
-        if not is_member_of_organization(user, org_id):
+        if not is_member_of_organization(user, org_id, request):
             return Response({"detail": "Unauthorized for this organization."}, status=403)
 
-        today = now().date()
-        start_date = start_date or (today - timedelta(days=7)).isoformat()
-        end_date = end_date or today.isoformat()
-
-        tasks = Task.objects.filter(
-            organization_id=org_id,
-            completed_at__date__range=(start_date, end_date)
-        )
-
-        if project_id:
-            tasks = tasks.filter(column__board__project_id=project_id)
-
-        tasks = tasks.annotate(date=TruncDate("completed_at")).values("date").annotate(
-            completed_tasks_count=Count("id")
-        ).order_by("date")
-
-        serializer = TasksCompletedSerializer(tasks, many=True)
+        days = completed_per_day(org_id, project_id, *date_range(request.query_params, 7))
+        serializer = TasksCompletedSerializer(days, many=True)
         return Response(serializer.data)
 
 
-class MemberProductivity(APIView):
+class MemberProductivity(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    @cached_analytics
     def get(self, request):
         user = request.user
         org_id = request.query_params.get("org_id")
@@ -60,26 +154,19 @@ class MemberProductivity(APIView):
         if not org_id:
             return Response({"detail": "Missing required parameter: org_id"}, status=400)
 
-        if not is_member_of_organization(user, org_id):
+        if not is_member_of_organization(user, org_id, request):
             return Response({"detail": "Unauthorized for this organization."}, status=403)
 
-        tasks = Task.objects.filter(organization_id=org_id)
-
-        if project_id:
-            tasks = tasks.filter(column__board__project_id=project_id)
-
-        tasks = tasks.values("assignees__id", "assignees__username").annotate(
-            completed=Count("id", filter=Q(completed_at__isnull=False)),
-            pending=Count("id", filter=Q(completed_at__isnull=True)),
-        ).order_by("-completed")
-
-        serializer = MemberProductivitySerializer(tasks, many=True)
+        members = with_pending_counts(member_productivity(org_id, project_id))
+        serializer = MemberProductivitySerializer(members, many=True)
         return Response(serializer.data)
 
 
-class MissedDeadlines(APIView):
+class MissedDeadlines(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    @cached_analytics
     def get(self, request):
         user = request.user
         org_id = request.query_params.get("org_id")
@@ -88,27 +175,19 @@ class MissedDeadlines(APIView):
         if not org_id:
             return Response({"detail": "Missing required parameter: org_id"}, status=400)
 
-        if not is_member_of_organization(user, org_id):
+        if not is_member_of_organization(user, org_id, request):
             return Response({"detail": "Unauthorized for this organization."}, status=403)
 
-        today = now().date()
-
-        tasks = Task.objects.filter(
-            organization_id=org_id,
-            due_date__lt=today,
-            completed_at__isnull=True
-        )
-
-        if project_id:
-            tasks = tasks.filter(column__board__project_id=project_id)
-
-        serializer = MissedDeadlinesSerializer(tasks, many=True)
+        days = missed_deadlines_per_day(org_id, project_id)
+        serializer = MissedDeadlinesSerializer(days, many=True)
         return Response(serializer.data)
 
 
-class BurnDownChart(APIView):
+class BurnDownChart(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    @cached_analytics
     def get(self, request):
         user = request.user
         org_id = request.query_params.get("org_id")
@@ -117,18 +196,10 @@ class BurnDownChart(APIView):
         if not org_id:
             return Response({"detail": "Missing required parameter: org_id"}, status=400)
 
-        if not is_member_of_organization(user, org_id):
+        if not is_member_of_organization(user, org_id, request):
             return Response({"detail": "Unauthorized for this organization."}, status=403)
 
-        tasks = Task.objects.filter(organization_id=org_id)
-
-        if project_id:
-            tasks = tasks.filter(column__board__project_id=project_id)
-
-        tasks = tasks.annotate(date=TruncDate("created_at")).values("date").annotate(
-            created_count=Count("id"),
-            completed_count=Count("id", filter=Q(completed_at__isnull=False))
-        ).order_by("date")
-
-        serializer = BurndownChartSerializer(tasks, many=True)
+        start_date, end_date = date_range(request.query_params, 30)
+        series = remaining_series(burndown_days(org_id, project_id, start_date, end_date), start_date, end_date)
+        serializer = BurndownChartSerializer(series, many=True)
         return Response(serializer.data)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import get_search_backend
+
+        post_migrate.connect(lambda **kwargs: get_search_backend.cache_clear(), weak=False, dispatch_uid='core.search_backend')
@@ -0,0 +1,226 @@
+"""Async versions of the hot read endpoints, for ASGI servers.
+
+Each view answers like its DRF counterpart (same serializers, pagination,
+caching and error bodies) but awaits the async ORM instead of holding a
+worker thread for the whole request. Django still executes SQL in the
+request's one thread-sensitive sync thread, so ``asyncio.gather`` overlaps
+the awaits around independent queries rather than running them in parallel.
+Writes stay on the sync viewsets.
+"""
+import asyncio
+
+from django.http import HttpResponse
+from django.utils.timezone import now
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .analytics import (
+    burndown_days, completed_per_day, date_range, member_productivity, missed_deadlines_per_day, remaining_series,
+    with_pending_counts,
+)
+from .filters import filter_tasks
+from .models import Board, Task
+from .pagination import CreatedAtCursorPagination
+from .renderers import FastJSONRenderer
+from .replicas import aread_alias, reading_from
+from .serializers import (
+    BurndownChartSerializer, MemberProductivitySerializer, MissedDeadlinesSerializer, TasksCompletedSerializer,
+    TaskSerializer,
+)
+from .tagged_cache import acached_analytics
+from .utils import aget_active_organization, aget_role
+from .views import board_snapshot, parse_since, snapshot_tasks
+
+SNAPSHOT_CHUNK_SIZE = 2000
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the user loaded through the async ORM."""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token)
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+
+class AsyncAPIView(View):
+    """JWT authentication, user throttling and DRF-style errors for async GET handlers.
+
+    Handlers receive a DRF ``Request`` (for ``query_params`` and serializer
+    context) and return a DRF ``Response``, which ``renderer_class`` renders here.
+    """
+    http_method_names = ['get', 'options']
+    authenticator_class = AsyncJWTAuthentication
+    throttle_classes = [UserRateThrottle]
+    renderer_class = FastJSONRenderer
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authenticator_class()
+        try:
+            user = await authenticator.aauthenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            self.request = Request(request)
+            self.request.user = user
+            self.check_throttles(self.request)
+            with reading_from(await aread_alias(request)):
+                response = await super().dispatch(self.request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(exc, authenticator.authenticate_header(request))
+        return self.render(response)
+
+    def check_throttles(self, request):
+        # DRF throttles are synchronous; their cache lookups are short next to
+        # the request's queries.
+        durations = []
+        for throttle in (throttle_class() for throttle_class in self.throttle_classes):
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+        if durations:
+            raise exceptions.Throttled(max((d for d in durations if d is not None), default=None))
+
+    def handle_exception(self, exc, auth_header):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            headers['WWW-Authenticate'] = auth_header
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = '%d' % exc.wait
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return Response(data, status=exc.status_code, headers=headers)
+
+    def render(self, response):
+        if not isinstance(response, Response):
+            return response
+        if response.data is None:
+            rendered = HttpResponse(status=response.status_code)
+        else:
+            renderer = self.renderer_class()
+            rendered = HttpResponse(renderer.render(response.data), status=response.status_code, content_type=renderer.media_type)
+        for name, value in response.items():
+            if name != 'Content-Type':
+                rendered[name] = value
+        return rendered
+
+
+class AsyncTaskListView(AsyncAPIView):
+    """``TaskViewSet.list``: the active organization's tasks, filtered and cursor paginated."""
+    query_budget = 6
+
+    async def get(self, request):
+        org = await aget_active_organization(request)
+        tasks = filter_tasks(Task.objects.for_organization(org).with_related(), request.query_params, request)
+        paginator = CreatedAtCursorPagination()
+        page = await paginator.apaginate_queryset(tasks, request, view=self)
+        data = TaskSerializer(page, many=True, context={'request': request, 'view': self}).data
+        return Response(paginator.get_paginated_data(data))
+
+
+class AsyncBoardSnapshotView(AsyncAPIView):
+    """``BoardViewSet.snapshot``: after the membership check, columns and tasks are fetched concurrently."""
+    query_budget = 9
+
+    async def get(self, request, pk):
+        server_time = now()
+        since = parse_since(request.query_params.get('since'))
+        org = await aget_active_organization(request)
+        board = await Board.objects.filter(project__organization=org, pk=pk).afirst()
+        if board is None:
+            raise exceptions.NotFound('No Board matches the given query.')
+
+        if await aget_role(request.user, board.organization_id, request) is None:
+            raise exceptions.PermissionDenied()
+
+        board_tasks = Task.objects.filter(column__board_id=board.id)
+        columns, tasks, task_ids = await asyncio.gather(
+            alist(board.columns.order_by('order', 'id')),
+            alist(snapshot_tasks(board_tasks, since).aiterator(chunk_size=SNAPSHOT_CHUNK_SIZE)),
+            alist(board_tasks.values_list('id', flat=True)) if since else anone(),
+        )
+        context = {'request': request, 'view': self}
+        return Response(board_snapshot(board, columns, tasks, context, server_time, task_ids))
+
+
+async def alist(rows):
+    return [row async for row in rows]
+
+
+async def anone():
+    return None
+
+
+class AsyncAnalyticsView(AsyncAPIView):
+    """Parameter and membership checks shared by the async analytics views."""
+    query_budget = 3
+
+    async def get(self, request):
+        org_id = request.query_params.get('org_id')
+        project_id = request.query_params.get('project_id')
+        if not org_id:
+            return Response({'detail': 'Missing required parameter: org_id'}, status=status.HTTP_400_BAD_REQUEST)
+        if await aget_role(request.user, org_id, request) is None:
+            return Response({'detail': 'Unauthorized for this organization.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(await self.get_data(request, org_id, project_id))
+
+
+class AsyncTasksCompletedPerDay(AsyncAnalyticsView):
+    cache_name = 'TasksCompletedPerDay'
+    get = acached_analytics(AsyncAnalyticsView.get)
+
+    async def get_data(self, request, org_id, project_id):
+        days = completed_per_day(org_id, project_id, *date_range(request.query_params, 7))
+        return TasksCompletedSerializer(await alist(days.aiterator()), many=True).data
+
+
+class AsyncMemberProductivity(AsyncAnalyticsView):
+    cache_name = 'MemberProductivity'
+    get = acached_analytics(AsyncAnalyticsView.get)
+
+    async def get_data(self, request, org_id, project_id):
+        members = with_pending_counts(await alist(member_productivity(org_id, project_id).aiterator()))
+        return MemberProductivitySerializer(members, many=True).data
+
+
+class AsyncMissedDeadlines(AsyncAnalyticsView):
+    cache_name = 'MissedDeadlines'
+    get = acached_analytics(AsyncAnalyticsView.get)
+
+    async def get_data(self, request, org_id, project_id):
+        days = await alist(missed_deadlines_per_day(org_id, project_id).aiterator())
+        return MissedDeadlinesSerializer(days, many=True).data
+
+
+class AsyncBurnDownChart(AsyncAnalyticsView):
+    cache_name = 'BurnDownChart'
+    get = acached_analytics(AsyncAnalyticsView.get)
+
+    async def get_data(self, request, org_id, project_id):
+        start_date, end_date = date_range(request.query_params, 30)
+        days = await alist(burndown_days(org_id, project_id, start_date, end_date).aiterator())
+        series = remaining_series(days, start_date, end_date)
+        return BurndownChartSerializer(series, many=True).data
@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+from rest_framework import serializers
+
+from .models import Column, Label, Task
+from .ordering import RANK_GAP, RANK_LIMIT, rebalance
+from .signals import bulk_task_change
+
+User = get_user_model()
+
+BULK_TASK_LIMIT = getattr(settings, 'BULK_TASK_LIMIT', 5000)
+BATCH_SIZE = 500
+
+
+class BulkTaskItemSerializer(serializers.Serializer):
+    """One entry of a bulk payload: with ``id`` it updates (or moves) a task, without it creates one.
+
+    References are plain ids here; they are resolved for the whole batch at once
+    by ``bulk_save_tasks`` instead of one lookup per item and field.
+    """
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    column = serializers.IntegerField(required=False)
+    assignees = serializers.ListField(child=serializers.IntegerField(), required=False)
+    labels = serializers.ListField(child=serializers.IntegerField(), required=False)
+    due_date = serializers.DateField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=Task._meta.get_field('priority').choices, required=False)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            missing = {name: ['This field is required.'] for name in ('title', 'column') if name not in attrs}
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
+
+
+def _resolve(items, organization):
+    """Check every referenced column, task, user and label with one query per model."""
+    column_ids = {item['column'] for item in items if 'column' in item}
+    task_ids = {item['id'] for item in items if 'id' in item}
+    user_ids = {pk for item in items for pk in item.get('assignees', ())}
+    label_ids = {pk for item in items for pk in item.get('labels', ())}
+
+    tasks = Task.objects.for_organization(organization).in_bulk(task_ids) if task_ids else {}
+    # The updated tasks' current columns too, for the boards they leave.
+    column_ids |= {task.column_id for task in tasks.values()}
+    columns = {
+        pk: (organization_id, project_id, board_id)
+        for pk, organization_id, project_id, board_id
+        in Column.objects.filter(id__in=column_ids).values_list('id', 'organization_id', 'project_id', 'board_id')
+    } if column_ids else {}
+    users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True)) if user_ids else set()
+    labels = set(Label.objects.filter(id__in=label_ids).values_list('id', flat=True)) if label_ids else set()
+
+    errors, seen = [], set()
+    for item in items:
+        item_errors = {}
+        if 'id' in item and item['id'] not in tasks:
+            item_errors['id'] = ['Task not found in the active organization.']
+        elif 'id' in item and item['id'] in seen:
+            item_errors['id'] = ['Task appears more than once in the payload.']
+        seen.add(item.get('id'))
+        if 'column' in item and columns.get(item['column'], (None,))[0] != organization.id:
+            item_errors['column'] = ['Column does not belong to the active organization.']
+        unknown_users = [pk for pk in item.get('assignees', ()) if pk not in users]
+        if unknown_users:
+            item_errors['assignees'] = [f'Invalid pk "{pk}" - object does not exist.' for pk in unknown_users]
+        unknown_labels = [pk for pk in item.get('labels', ()) if pk not in labels]
+        if unknown_labels:
+            item_errors['labels'] = [f'Invalid pk "{pk}" - object does not exist.' for pk in unknown_labels]
+        errors.append(item_errors)
+    if any(errors):
+        raise serializers.ValidationError(errors)
+    return columns, tasks
+
+
+def _replace_m2m(through, source_field, target_field, rows, clear_ids):
+    if clear_ids:
+        through.objects.filter(**{f'{source_field}__in': clear_ids}).delete()
+    through.objects.bulk_create(
+        [through(**{f'{source_field}_id': source, f'{target_field}_id': target}) for source, target in rows],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def bulk_save_tasks(data, organization):
+    """Validate and write a list of task payloads in a single transaction.
+
+    Returns ``(task_id, board_id, previous_board_id)`` per saved task in payload
+    order; ``previous_board_id`` is None for created tasks.
+    """
+    if not isinstance(data, list):
+        raise serializers.ValidationError({'tasks': ['Expected a list of tasks.']})
+    if len(data) > BULK_TASK_LIMIT:
+        raise serializers.ValidationError({'tasks': [f'At most {BULK_TASK_LIMIT} tasks per request.']})
+
+    serializer = BulkTaskItemSerializer(data=data, many=True)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data
+    columns, existing = _resolve(items, organization)
+
+    task_fields = ('title', 'description', 'column', 'due_date', 'priority', 'completed_at')
+
+    def appended(item):
+        if 'id' not in item:
+            return True
+        return 'column' in item and item['column'] != existing[item['id']].column_id
+
+    # New tasks and tasks moved to another column go to its end, one aggregate for all columns.
+    new_columns = {item['column'] for item in items if appended(item)}
+    positions = dict(
+        Task.objects.filter(column_id__in=new_columns).values('column_id')
+        .annotate(last=Max('position')).values_list('column_id', 'last')
+    ) if new_columns else {}
+    appending = sum(1 for item in items if appended(item))
+    for column_id, last in positions.items():
+        if last + appending * RANK_GAP > RANK_LIMIT:
+            rows = rebalance(Task.objects.filter(column_id=column_id), 'position')
+            positions[column_id] = len(rows) * RANK_GAP
+            # bulk_update writes the loaded tasks' positions back, so they take the new ones.
+            for row in rows:
+                if row.pk in existing:
+                    existing[row.pk].position = row.position
+    to_create, to_update, updated_fields = [], [], {'updated_at'}
+    for item in items:
+        values = {name: item[name] for name in task_fields if name in item}
+        if 'id' in item:
+            task = existing[item['id']]
+            item['previous_board_id'] = columns[task.column_id][2]
+            updated_fields.update(values)
+            to_update.append(task)
+        else:
+            task = Task()
+            item['previous_board_id'] = None
+            to_create.append(task)
+        if appended(item):
+            positions[item['column']] = positions.get(item['column'], 0) + RANK_GAP
+            task.position = positions[item['column']]
+            if 'id' in item:
+                updated_fields.add('position')
+        if 'column' in values:
+            column_id = values.pop('column')
+            values['column_id'] = column_id
+            values['organization_id'], values['project_id'], _ = columns[column_id]
+            if 'id' in item:
+                updated_fields.update(('organization', 'project'))
+        for attr, value in values.items():
+            setattr(task, attr, value)
+        item['task'] = task
+
+    timestamp = now()
+    with transaction.atomic(), bulk_task_change([task.pk for task in to_update]) as created_ids:
+        Task.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        created_ids.extend(task.pk for task in to_create)
+        if to_update:
+            for task in to_update:
+                task.updated_at = timestamp
+            Task.objects.bulk_update(to_update, sorted(updated_fields), batch_size=BATCH_SIZE)
+
+        assignee_through = Task.assignees.through
+        label_through = Label.tasks.through
+        user_field = Task.assignees.field.m2m_reverse_field_name()
+        for key, through, source, target in (
+            ('assignees', assignee_through, 'task', user_field),
+            ('labels', label_through, 'task', 'label'),
+        ):
+            with_values = [item for item in items if key in item]
+            if not with_values:
+                continue
+            _replace_m2m(
+                through, source, target,
+                rows=[(item['task'].pk, pk) for item in with_values for pk in set(item[key])],
+                clear_ids=[item['task'].pk for item in with_values if 'id' in item],
+            )
+
+    return [(item['task'].pk, columns[item['task'].column_id][2], item['previous_board_id']) for item in items]
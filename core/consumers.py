@@ -0,0 +1,51 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .models import Board
+from .realtime import board_group_name, coalesce_events
+from .utils import get_role
+
+
+class BoardConsumer(AsyncJsonWebsocketConsumer):
+    """Streams task, column and comment changes of one board.
+
+    Events published within ``BOARD_BROADCAST_WINDOW`` seconds of each other are
+    coalesced and sent to the client as a single ``batch`` frame.
+    """
+    coalesce_window = getattr(settings, 'BOARD_BROADCAST_WINDOW', 0.05)
+
+    async def connect(self):
+        self.board_id = int(self.scope['url_route']['kwargs']['board_id'])
+        self.pending = []
+        self.flush_task = None
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated or not await self.can_view_board(user):
+            await self.close(code=4403)
+            return
+        self.group_name = board_group_name(self.board_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @database_sync_to_async
+    def can_view_board(self, user):
+        org_id = Board.objects.filter(pk=self.board_id).values_list('organization_id', flat=True).first()
+        return get_role(user, org_id) is not None
+
+    async def board_events(self, message):
+        self.pending.extend(message['events'])
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.coalesce_window)
+        events, self.pending, self.flush_task = coalesce_events(self.pending), [], None
+        await self.send_json({'type': 'batch', 'board': self.board_id, 'events': events})
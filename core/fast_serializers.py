@@ -0,0 +1,171 @@
+"""Read-only list serialization straight from ``.values()`` rows.
+
+A fast serializer mirrors one DRF serializer. The fields it outputs, their
+order and how each one represents a stored value are worked out from the DRF
+serializer's fields, so a page of rows becomes plain dicts through a
+precomputed mapper per field instead of field objects, model instances and
+``get_attribute`` calls per value. The parity tests keep both paths' output
+identical; anything a mapper does not know falls back to the DRF field's own
+``to_representation``.
+"""
+from operator import itemgetter
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .instrumentation import serializer_timing
+from .serializers import ActivityLogSerializer, CommentSerializer, TaskSerializer, UserSerializer, requested_fields
+
+# Fields whose representation of a value read from the database is the value itself.
+_PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField)
+
+
+def _iso_datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return None
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def represent(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return represent
+
+
+def _iso_date(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def value_mapper(field):
+    """A function from a stored, non-null value to ``field.to_representation(value)``, or None if that is the value."""
+    if isinstance(field, serializers.DateTimeField):
+        return _iso_datetime(field)
+    if isinstance(field, serializers.DateField):
+        return _iso_date(field)
+    if isinstance(field, (*_PLAIN_FIELDS, serializers.StringRelatedField)):
+        # values() already reads the lookup the string representation is built from.
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    return field.to_representation
+
+
+def _many_to_many(model, name):
+    # The model on the other side and its lookup back to ``model``, as prefetch_related queries them.
+    field = model._meta.get_field(name)
+    return field.related_model, field.field.name if field.auto_created else field.related_query_name()
+
+
+class FastSerializer:
+    serializer_class = None
+    # Output field -> values() lookup, where that is not the field's source.
+    lookups = {}
+    # Output field -> FastSerializer standing in for a nested serializer.
+    nested = {}
+
+    def __init__(self, request=None, prefix=''):
+        self.request = request
+        self.prefix = prefix
+        fields = self.reference_fields()
+        wanted = requested_fields(request, fields)
+        self.fields = {name: field for name, field in fields.items() if not wanted or name in wanted}
+
+    @classmethod
+    def reference_fields(cls):
+        # Serializer definitions are static, so the field objects are built once per class.
+        if '_reference_fields' not in cls.__dict__:
+            fields = cls.serializer_class().fields
+            cls._reference_fields = {name: field for name, field in fields.items() if not field.write_only}
+        return cls._reference_fields
+
+    def column(self, name, field):
+        return self.prefix + self.lookups.get(name, field.source)
+
+    def columns(self):
+        columns = [self.prefix + 'id']
+        for name, field in self.fields.items():
+            if name in self.nested:
+                columns += self.nested[name](prefix=self.column(name, field) + '__').columns()
+            elif not isinstance(field, (serializers.ManyRelatedField, serializers.SerializerMethodField)):
+                columns.append(self.column(name, field))
+        return columns
+
+    def values(self, queryset, *extra):
+        """``queryset`` as rows holding every column the output needs, plus ``extra`` (e.g. pagination ordering)."""
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*self.columns(), *extra]))
+
+    def converter(self, name, field, rows):
+        """A function from a row to the value of output field ``name``."""
+        if name in self.nested:
+            nested = self.nested[name](prefix=self.column(name, field) + '__')
+            converters = nested.converters(rows)
+            key = nested.prefix + 'id'
+            return lambda row: None if row[key] is None else {name: convert(row) for name, convert in converters}
+        if isinstance(field, serializers.ManyRelatedField):
+            return self.many_converter(name, rows)
+        column, mapper = self.column(name, field), value_mapper(field)
+        if mapper is None:
+            return itemgetter(column)
+        return lambda row: None if row[column] is None else mapper(row[column])
+
+    def many_converter(self, name, rows):
+        # Primary keys of the related objects, all rows' in one query.
+        model, lookup = _many_to_many(self.serializer_class.Meta.model, name)
+        related = {}
+        ids = [row[self.prefix + 'id'] for row in rows]
+        for row_id, pk in model.objects.filter(**{f'{lookup}__in': ids}).values_list(lookup, 'pk'):
+            related.setdefault(row_id, []).append(pk)
+        key = self.prefix + 'id'
+        return lambda row: related.get(row[key], [])
+
+    def converters(self, rows):
+        return [(name, self.converter(name, field, rows)) for name, field in self.fields.items()]
+
+    def serialize(self, rows):
+        with serializer_timing():
+            rows = list(rows)
+            converters = self.converters(rows)
+            return [{name: convert(row) for name, convert in converters} for row in rows]
+
+
+class UserFastSerializer(FastSerializer):
+    serializer_class = UserSerializer
+
+
+class TaskFastSerializer(FastSerializer):
+    serializer_class = TaskSerializer
+
+
+class ActivityLogFastSerializer(FastSerializer):
+    serializer_class = ActivityLogSerializer
+    # The related objects' __str__.
+    lookups = {'user': 'user__username', 'task': 'task__title', 'project': 'project__name'}
+
+
+class CommentFastSerializer(FastSerializer):
+    """Comments with their replies nested from ``children`` (parent id -> rows), ``max_depth`` levels deep."""
+    serializer_class = CommentSerializer
+    nested = {'user': UserFastSerializer}
+
+    def __init__(self, request=None, children=None, max_depth=0, depth=0):
+        super().__init__(request)
+        self.children, self.max_depth, self.depth = children or {}, max_depth, depth
+
+    def columns(self):
+        # Replies are grouped by parent.
+        return [*super().columns(), 'parent']
+
+    def converter(self, name, field, rows):
+        if name != 'replies':
+            return super().converter(name, field, rows)
+        if self.depth + 1 > self.max_depth:
+            return lambda row: []
+        replies = CommentFastSerializer(self.request, self.children, self.max_depth, self.depth + 1)
+        return lambda row: replies.serialize(self.children.get(row['id'], []))
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils.timezone import localdate
+from rest_framework import serializers
+
+from .models import Label, Task
+
+MAX_FILTER_VALUES = 20
+MAX_DUE_RANGE = timedelta(days=92)
+
+
+class CommaSeparatedField(serializers.Field):
+    """``?label=1,2,3`` as a list, each value validated by ``child``."""
+
+    def __init__(self, child, **kwargs):
+        self.child = child
+        super().__init__(**kwargs)
+        self.child.bind(field_name='', parent=self)
+
+    def to_internal_value(self, data):
+        values = [value.strip() for value in str(data).split(',') if value.strip()]
+        if not values:
+            raise serializers.ValidationError('Expected at least one value.')
+        if len(values) > MAX_FILTER_VALUES:
+            raise serializers.ValidationError(f'At most {MAX_FILTER_VALUES} values.')
+        return [self.child.run_validation(value) for value in values]
+
+
+class AssigneeField(serializers.IntegerField):
+    # ``me`` stands for the requesting user.
+    def to_internal_value(self, data):
+        if data == 'me':
+            return self.context['request'].user.id
+        return super().to_internal_value(data)
+
+
+class TaskFilterSerializer(serializers.Serializer):
+    """Query parameters accepted by the task list and export.
+
+    Every filter maps onto an index: column and board on the column foreign
+    key, assignee and label on their through tables (as semi-joins, so no
+    DISTINCT is needed), priority on (organization, priority, created_at)
+    and due dates and ``overdue`` on (organization, due_date).
+    """
+    column = CommaSeparatedField(serializers.IntegerField(min_value=1), required=False)
+    board = serializers.IntegerField(min_value=1, required=False)
+    assignee = CommaSeparatedField(AssigneeField(min_value=1), required=False)
+    label = CommaSeparatedField(serializers.IntegerField(min_value=1), required=False)
+    priority = CommaSeparatedField(serializers.ChoiceField(Task._meta.get_field('priority').choices), required=False)
+    due_after = serializers.DateField(required=False)
+    due_before = serializers.DateField(required=False)
+    overdue = serializers.BooleanField(required=False)
+    completed = serializers.BooleanField(required=False)
+
+    def to_internal_value(self, data):
+        # BooleanFields default to False when absent from a QueryDict.
+        data = {name: data[name] for name in self.fields if name in data}
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        due_after, due_before = attrs.get('due_after'), attrs.get('due_before')
+        if (due_after is None) != (due_before is None):
+            # One open end sorts every task before or after the date.
+            raise serializers.ValidationError('due_after and due_before must be given together.')
+        if due_after is not None:
+            if due_after > due_before:
+                raise serializers.ValidationError('due_after must not be later than due_before.')
+            if due_before - due_after > MAX_DUE_RANGE:
+                raise serializers.ValidationError(f'Due date ranges are limited to {MAX_DUE_RANGE.days} days.')
+        if attrs.get('overdue') and attrs.get('completed'):
+            raise serializers.ValidationError('Completed tasks are never overdue.')
+        return attrs
+
+
+def filter_tasks(queryset, params, request):
+    """Apply the validated ``params`` to ``queryset``; raises ValidationError (400) on bad input."""
+    serializer = TaskFilterSerializer(data=params, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+    if not filters:
+        return queryset
+
+    q = Q()
+    if 'column' in filters:
+        q &= Q(column_id__in=filters['column'])
+    if 'board' in filters:
+        q &= Q(column__board_id=filters['board'])
+    if 'assignee' in filters:
+        through = Task.assignees.through
+        user_field = Task.assignees.field.m2m_reverse_field_name()
+        q &= Q(id__in=through.objects.filter(**{f'{user_field}_id__in': filters['assignee']}).values('task_id'))
+    if 'label' in filters:
+        q &= Q(id__in=Label.tasks.through.objects.filter(label_id__in=filters['label']).values('task_id'))
+    if 'priority' in filters:
+        q &= Q(priority__in=filters['priority'])
+    if 'due_after' in filters:
+        q &= Q(due_date__range=(filters['due_after'], filters['due_before']))
+    if filters.get('overdue'):
+        q &= Q(due_date__lt=localdate(), completed_at__isnull=True)
+    elif filters.get('overdue') is False:
+        q &= Q(due_date__gte=localdate()) | Q(due_date__isnull=True) | Q(completed_at__isnull=False)
+    if 'completed' in filters:
+        q &= Q(completed_at__isnull=not filters['completed'])
+    return queryset.filter(q)
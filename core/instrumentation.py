@@ -0,0 +1,254 @@
+import hmac
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('core_request_metrics', default=None)
+
+
+def _options():
+    return {
+        'ENABLED': True,
+        'SERVER_TIMING': True,
+        'ENFORCE_BUDGETS': False,
+        **getattr(settings, 'INSTRUMENTATION', {}),
+    }
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    """SQL and serializer cost of one request; also the execute wrapper that counts queries."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += perf_counter() - start
+
+
+@contextmanager
+def serializer_timing():
+    """Adds the time spent in the block to the request's serializer metrics, unless an outer block already does."""
+    metrics = _current.get()
+    if metrics is None or metrics._serializer_depth:
+        yield
+        return
+    metrics._serializer_depth += 1
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += perf_counter() - start
+        metrics._serializer_depth -= 1
+
+
+class SerializerTimingMixin:
+    """Adds the time spent in the outermost ``to_representation`` to the request's metrics."""
+
+    def to_representation(self, instance):
+        with serializer_timing():
+            return super().to_representation(instance)
+
+
+class MetricsRegistry:
+    """Process-local aggregates per view, rendered in the Prometheus text format."""
+
+    DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}
+            self._views = {}
+
+    def record(self, view, method, status, duration, metrics, size):
+        with self._lock:
+            key = (view, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            stats = self._views.setdefault(view, {
+                'buckets': [0] * len(self.DURATION_BUCKETS),
+                'count': 0, 'duration': 0.0, 'queries': 0, 'sql': 0.0, 'serializer': 0.0, 'bytes': 0,
+            })
+            for i, bound in enumerate(self.DURATION_BUCKETS):
+                if duration <= bound:
+                    stats['buckets'][i] += 1
+            stats['count'] += 1
+            stats['duration'] += duration
+            stats['queries'] += metrics.queries
+            stats['sql'] += metrics.sql_time
+            stats['serializer'] += metrics.serializer_time
+            stats['bytes'] += size
+
+    def render(self):
+        with self._lock:
+            requests = sorted(self._requests.items())
+            views = sorted((view, {**stats, 'buckets': list(stats['buckets'])}) for view, stats in self._views.items())
+
+        lines = [
+            '# HELP http_requests_total Requests served, by view, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        lines += [
+            f'http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}'
+            for (view, method, status), count in requests
+        ]
+        lines += [
+            '# HELP http_request_duration_seconds Time spent producing the response.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for view, stats in views:
+            for bound, count in zip(self.DURATION_BUCKETS, stats['buckets']):
+                lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{{view="{view}"}} {stats["duration"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{view="{view}"}} {stats["count"]}')
+        for name, key, kind, help_text in (
+            ('db_queries_total', 'queries', 'counter', 'SQL queries executed.'),
+            ('db_query_seconds_total', 'sql', 'counter', 'Time spent in SQL.'),
+            ('serializer_seconds_total', 'serializer', 'counter', 'Time spent in DRF serializers.'),
+            ('http_response_bytes_total', 'bytes', 'counter', 'Bytes of non-streaming response bodies.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{{view="{view}"}} {stats[key]}' for view, stats in views]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def query_budget(request):
+    """The budget declared by the matched view as ``query_budget``: an int, or a dict per action."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    cls = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    budget = getattr(cls, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(match.func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+def check_budget(request, metrics):
+    budget = query_budget(request)
+    if budget is None or metrics.queries <= budget:
+        return
+    message = f'{request.method} {request.path} ran {metrics.queries} queries, over its budget of {budget}.'
+    if _options()['ENFORCE_BUDGETS']:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class InstrumentationMiddleware:
+    """Counts SQL queries and times SQL, serializers and the whole request.
+
+    Results go to a ``Server-Timing`` header and the process-wide registry
+    served by ``metrics_view``. Views declaring ``query_budget`` are checked
+    against it; with ``INSTRUMENTATION['ENFORCE_BUDGETS']`` an overrun raises.
+    Queries run while a streaming response is consumed are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        options = _options()
+        if not options['ENABLED']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, perf_counter() - start, options)
+
+    async def __acall__(self, request):
+        options = _options()
+        if not options['ENABLED']:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = perf_counter()
+        # The ORM runs in the request's thread-sensitive sync thread, whose
+        # connections are not the event loop's, so wrap them from there.
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.wrap_connections)(stack, metrics)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.finish(request, response, metrics, perf_counter() - start, options)
+
+    def wrap_connections(self, stack, metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def finish(self, request, response, metrics, duration, options):
+        size = 0 if response.streaming else len(response.content)
+        registry.record(view_name(request), request.method, response.status_code, duration, metrics, size)
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'ser;dur={metrics.serializer_time * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        check_budget(request, metrics)
+        return response
+
+
+def _has_metrics_token(request):
+    token = _options().get('METRICS_TOKEN')
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, open to staff users and to ``INSTRUMENTATION['METRICS_TOKEN']``."""
+    user = getattr(request, 'user', None)
+    if not _has_metrics_token(request) and not (user is not None and user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.utils.timezone import now
+
+from core.models import ActivityLog, Task
+from core.sqlite import write_transaction
+
+from .run_benchmarks import percentile
+
+# The plain configuration the backend shipped with, against the tuned one from settings.
+MODES = {
+    'plain': {'init_command': 'PRAGMA journal_mode=DELETE'},
+    'tuned': settings.SQLITE_OPTIONS,
+}
+
+
+def _update_task(task_id, worker):
+    # A task edit plus its audit row, like TaskSerializer.update and log_activity.
+    Task.objects.filter(pk=task_id).update(title=f'Benchmark edit by worker {worker}', updated_at=now())
+    task = Task.objects.only('id', 'project_id').get(pk=task_id)
+    ActivityLog.objects.create(task_id=task.id, project_id=task.project_id, action='updated', description='Benchmark edit')
+
+
+def _worker(args):
+    mode, path, task_ids, operations, read_ratio, worker = args
+    connection = connections['default']
+    connection.settings_dict.update(NAME=path, OPTIONS=dict(MODES[mode]))
+    write = write_transaction(_update_task) if mode == 'tuned' else transaction.atomic()(_update_task)
+    rng = random.Random(worker)
+    latencies, errors = [], 0
+    for _ in range(operations):
+        task_id = rng.choice(task_ids)
+        start = perf_counter()
+        try:
+            if rng.random() < read_ratio:
+                list(Task.objects.filter(column_id=Task.objects.filter(pk=task_id).values('column_id')[:1])[:50])
+            else:
+                write(task_id, worker)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(perf_counter() - start)
+    connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer a copy of the SQLite database with concurrent worker processes, once with the plain '
+        'configuration and once with the tuned one, and compare throughput and "database is locked" errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=200, help='Operations per worker.')
+        parser.add_argument('--read-ratio', type=float, default=0.8, help='Share of operations that only read.')
+        parser.add_argument('--mode', action='append', choices=sorted(MODES), help='Only run these modes.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        task_ids = list(Task.objects.values_list('id', flat=True)[:1000])
+        if not task_ids:
+            raise CommandError('No tasks to write to; run generate_synthetic_data first.')
+
+        workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+        try:
+            for mode in options['mode'] or MODES:
+                path = os.path.join(workdir, f'{mode}.sqlite3')
+                # A consistent copy, so the real database is never written to.
+                with sqlite3.connect(settings.DATABASES['default']['NAME']) as source, sqlite3.connect(path) as target:
+                    source.backup(target)
+                self.report(mode, self.run_mode(mode, path, task_ids, options), options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run_mode(self, mode, path, task_ids, options):
+        # Forked workers must not share the parent's connection.
+        connections.close_all()
+        jobs = [
+            (mode, path, task_ids, options['operations'], options['read_ratio'], worker)
+            for worker in range(options['workers'])
+        ]
+        start = perf_counter()
+        with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+            results = pool.map(_worker, jobs)
+        elapsed = perf_counter() - start
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        return {'elapsed': elapsed, 'latencies': latencies, 'errors': sum(errors for _, errors in results)}
+
+    def report(self, mode, result, options):
+        latencies = result['latencies']
+        line = f"{mode:6} {len(latencies) / result['elapsed']:9.1f} ops/s  {result['errors']:5} locked errors"
+        if latencies:
+            line += f"  p50 {percentile(latencies, 0.5) * 1000:8.2f} ms  p99 {percentile(latencies, 0.99) * 1000:8.2f} ms"
+        self.stdout.write(line)
@@ -0,0 +1,106 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from core.analytics import burndown_days, completed_per_day, date_range, missed_deadlines_per_day
+from core.models import ActivityLog, Board, Column, Comment, Label, Organization, Project, Task, Tombstone
+
+# name -> callable(ids) returning the queryset an endpoint runs for its main page.
+ENDPOINT_QUERIES = {
+    'projects.list': lambda ids: Project.objects.filter(organization_id=ids['org']).order_by('-created_at', '-id'),
+    'boards.list': lambda ids: Board.objects.filter(project__organization_id=ids['org']).order_by('-id'),
+    'columns.list': lambda ids: Column.objects.filter(organization_id=ids['org']).order_by('order', 'id'),
+    'columns.board': lambda ids: Column.objects.filter(board_id=ids['board']).order_by('order', 'id'),
+    'tasks.list': lambda ids: Task.objects.for_organization(ids['org']).order_by('-created_at', '-id'),
+    'comments.list': lambda ids: Comment.objects.filter(task_id=ids['task']).order_by('created_at', 'id'),
+    'tasks.assignee_due': lambda ids: Task.objects.filter(
+        organization_id=ids['org'],
+        id__in=Task.assignees.through.objects.filter(customuser_id=ids['user']).values('task_id'),
+        due_date__range=(now().date(), now().date() + timedelta(days=7)),
+    ).order_by('-created_at', '-id'),
+    'tasks.overdue': lambda ids: Task.objects.filter(
+        organization_id=ids['org'], due_date__lt=now().date(), completed_at__isnull=True,
+    ).order_by('-created_at', '-id'),
+    'tasks.priority': lambda ids: Task.objects.filter(organization_id=ids['org'], priority='high').order_by('-created_at', '-id'),
+    'tasks.label': lambda ids: Task.objects.filter(
+        organization_id=ids['org'], id__in=Label.tasks.through.objects.filter(label_id=ids['label']).values('task_id'),
+    ).order_by('-created_at', '-id'),
+    'sync.tasks': lambda ids: Task.objects.filter(
+        organization_id=ids['org'], updated_at__gte=now() - timedelta(hours=1)
+    ).order_by('updated_at', 'id'),
+    'sync.columns': lambda ids: Column.objects.filter(
+        organization_id=ids['org'], updated_at__gte=now() - timedelta(hours=1)
+    ).order_by('updated_at', 'id'),
+    'sync.comments': lambda ids: Comment.objects.filter(
+        organization_id=ids['org'], updated_at__gte=now() - timedelta(hours=1)
+    ).order_by('updated_at', 'id'),
+    'sync.deleted': lambda ids: Tombstone.objects.filter(
+        organization_id=ids['org'], deleted_at__gte=now() - timedelta(hours=1)
+    ).order_by('deleted_at', 'id'),
+    'activity_logs.project': lambda ids: ActivityLog.objects.filter(project_id=ids['project']).order_by('-timestamp', '-id'),
+    'activity_logs.user': lambda ids: ActivityLog.objects.filter(user_id=ids['user']).order_by('-timestamp', '-id'),
+    'activity_logs.task': lambda ids: ActivityLog.objects.filter(task_id=ids['task']).order_by('-timestamp', '-id'),
+    'tasks.completed': lambda ids: Task.objects.filter(
+        organization_id=ids['org'], completed_at__gte=now() - timedelta(days=7)
+    ).order_by('-created_at', '-id'),
+    'analytics.missed_deadlines': lambda ids: missed_deadlines_per_day(ids['org'], None),
+    'analytics.tasks_completed': lambda ids: completed_per_day(ids['org'], None, *date_range({}, 7)),
+    'analytics.burndown': lambda ids: burndown_days(ids['org'], ids['project'], *date_range({}, 30)),
+}
+
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT)(\w+)(?! USING)(?:\s|$)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'mysql': re.compile(r'\btype: ALL\b.*?table: (\w+)'),
+}
+
+
+def sample_ids(org_id=None):
+    """Ids of real rows to plug into the queries, or 0 when the table is empty."""
+    org = Organization.objects.filter(pk=org_id).first() if org_id else Organization.objects.first()
+    if org_id and org is None:
+        raise CommandError(f'Organization {org_id} does not exist.')
+    task = Task.objects.filter(organization=org).first() if org else None
+    board = Board.objects.filter(organization=org).first() if org else None
+    member = org.memberships.first() if org else None
+    label = Label.objects.filter(tasks__organization=org).first() if org else None
+    return {
+        'org': org.pk if org else 0,
+        'project': board.project_id if board else 0,
+        'board': board.pk if board else 0,
+        'task': task.pk if task else 0,
+        'user': member.user_id if member else 0,
+        'label': label.pk if label else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan of every registered endpoint query and flag full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Organization whose ids are used as query parameters.')
+        parser.add_argument('--query', action='append', choices=sorted(ENDPOINT_QUERIES), help='Only explain these queries.')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any query scans a whole table.')
+
+    def handle(self, *args, **options):
+        ids = sample_ids(options['org'])
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        scans = {}
+
+        for name in options['query'] or ENDPOINT_QUERIES:
+            plan = ENDPOINT_QUERIES[name](ids).explain()
+            tables = sorted(set(pattern.findall(plan))) if pattern else []
+            if tables:
+                scans[name] = tables
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            if tables:
+                self.stdout.write(self.style.WARNING(f"full scan: {', '.join(tables)}"))
+            self.stdout.write('')
+
+        if scans and options['fail_on_scan']:
+            raise CommandError('Full table scans in: ' + ', '.join(f'{name} ({", ".join(t)})' for name, t in scans.items()))
+        self.stdout.write(self.style.SUCCESS(f'{len(scans)} queries with full table scans.'))
@@ -0,0 +1,150 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+
+from analytics.metrics import rebuild as rebuild_task_metrics
+from core.models import (
+    ActivityLog, Board, Column, Comment, CustomUser, Label, Membership, Organization, Project, Task,
+)
+from core.search import get_search_backend
+
+BATCH_SIZE = 1000
+WORDS = (
+    'login', 'signup', 'billing', 'invoice', 'report', 'dashboard', 'export', 'import', 'search', 'cache',
+    'timeout', 'mobile', 'sync', 'email', 'webhook', 'upload', 'avatar', 'permissions', 'audit', 'onboarding',
+)
+ACTIONS = ('created', 'updated', 'commented', 'assigned', 'unassigned')
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic data set of organizations with boards, tasks, comments and activity.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orgs', type=int, default=1)
+        parser.add_argument('--members', type=int, default=20, help='Members per organization.')
+        parser.add_argument('--projects', type=int, default=3, help='Projects per organization.')
+        parser.add_argument('--boards', type=int, default=2, help='Boards per project.')
+        parser.add_argument('--columns', type=int, default=4, help='Columns per board.')
+        parser.add_argument('--tasks', type=int, default=250, help='Tasks per board.')
+        parser.add_argument('--comments', type=int, default=3, help='Average comments per task.')
+        parser.add_argument('--activity', type=int, default=5, help='Activity log rows per task.')
+        parser.add_argument('--labels', type=int, default=10)
+        parser.add_argument('--days', type=int, default=90, help='Spread creation dates over this many days.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='synthetic', help='Prefix of generated names, to keep runs apart.')
+
+    def handle(self, *args, **options):
+        if options['members'] < 1 or options['columns'] < 1:
+            raise CommandError('Every organization needs at least one member and every board one column.')
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        labels = Label.objects.bulk_create(
+            [Label(name=f'{prefix}-{i}', color=rng.choice(('red', 'green', 'blue'))) for i in range(options['labels'])]
+        )
+        for index in range(options['orgs']):
+            with transaction.atomic():
+                org, counts = self.generate_organization(rng, f'{prefix}-{index}', labels, options)
+            # bulk_create skips the signals that maintain these.
+            rebuild_task_metrics(org.id)
+            get_search_backend().rebuild(org.id)
+            admin = org.memberships.filter(role='admin').select_related('user').first().user
+            summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f'Organization {org.id} "{org.name}" (admin {admin.username}): {summary}.'))
+
+    def generate_organization(self, rng, name, labels, options):
+        today = now()
+        days = options['days']
+
+        def moment():
+            return today - timedelta(days=rng.uniform(0, days))
+
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{name}-user-{i}', password=make_password(None))
+            for i in range(options['members'])
+        ])
+        org = Organization.objects.create(name=name)
+        Membership.objects.bulk_create([
+            Membership(user=user, organization=org, role='admin' if i == 0 else rng.choice(('manager', 'member', 'member')))
+            for i, user in enumerate(users)
+        ])
+        projects = Project.objects.bulk_create([Project(name=f'{name} project {i}', organization=org) for i in range(options['projects'])])
+        boards = Board.objects.bulk_create([
+            Board(name=f'{project.name} board {i}', project=project, organization=org)
+            for project in projects for i in range(options['boards'])
+        ])
+        columns = Column.objects.bulk_create([
+            Column(name=f'Column {i}', board=board, order=i, organization=org, project_id=board.project_id)
+            for board in boards for i in range(options['columns'])
+        ])
+        columns_by_board = {}
+        for column in columns:
+            columns_by_board.setdefault(column.board_id, []).append(column)
+
+        tasks = []
+        for board in boards:
+            for i in range(options['tasks']):
+                words = rng.sample(WORDS, 3)
+                tasks.append(Task(
+                    title=f'{words[0].title()} {words[1]} task {i}',
+                    description=f'Investigate the {words[1]} and {words[2]} behaviour.',
+                    column=rng.choice(columns_by_board[board.id]),
+                    organization=org,
+                    project_id=board.project_id,
+                    priority=rng.choice(('low', 'medium', 'high')),
+                    due_date=(today + timedelta(days=rng.randint(-30, 30))).date() if rng.random() < 0.7 else None,
+                ))
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        # auto_now_add/auto_now win on insert, so back-date in a second pass.
+        for task in tasks:
+            task.created_at = moment()
+            task.completed_at = task.created_at + timedelta(days=rng.uniform(0, 10)) if rng.random() < 0.3 else None
+            task.updated_at = task.completed_at or task.created_at
+        Task.objects.bulk_update(tasks, ['created_at', 'updated_at', 'completed_at'], batch_size=BATCH_SIZE)
+
+        Task.assignees.through.objects.bulk_create([
+            Task.assignees.through(task_id=task.pk, customuser_id=user.pk)
+            for task in tasks for user in rng.sample(users, min(len(users), rng.randint(1, 2)))
+        ], batch_size=BATCH_SIZE)
+        if labels:
+            Label.tasks.through.objects.bulk_create([
+                Label.tasks.through(task_id=task.pk, label_id=label.pk)
+                for task in tasks for label in rng.sample(labels, min(len(labels), rng.randint(0, 2)))
+            ], batch_size=BATCH_SIZE)
+
+        comments = self.generate_comments(rng, org, tasks, users, options['comments'])
+
+        ActivityLog.objects.bulk_create([
+            ActivityLog(
+                user=rng.choice(users), task=task, project_id=task.project_id, action=rng.choice(ACTIONS),
+                description=f'Synthetic activity on {task.title}', timestamp=moment(),
+            )
+            for task in tasks for _ in range(options['activity'])
+        ], batch_size=BATCH_SIZE)
+
+        return org, {
+            'members': len(users), 'projects': len(projects), 'boards': len(boards), 'columns': len(columns),
+            'tasks': len(tasks), 'comments': comments, 'activity logs': len(tasks) * options['activity'],
+        }
+
+    def generate_comments(self, rng, org, tasks, users, average):
+        # Roots first, then replies in a few rounds so threads get deeper than one level.
+        comments = Comment.objects.bulk_create([
+            Comment(task=task, user=rng.choice(users), content=f'Looked into {task.title.lower()}.', organization=org)
+            for task in tasks for _ in range(rng.randint(0, 2 * average))
+        ], batch_size=BATCH_SIZE)
+        total, parents = len(comments), comments
+        for _ in range(3):
+            replies = Comment.objects.bulk_create([
+                Comment(
+                    task_id=parent.task_id, user=rng.choice(users), content='Agreed, will follow up.',
+                    parent=parent, organization=org,
+                )
+                for parent in parents if rng.random() < 0.5
+            ], batch_size=BATCH_SIZE)
+            total += len(replies)
+            parents = replies
+        return total
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of tasks and comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Only rebuild documents of this organization.')
+
+    def handle(self, *args, **options):
+        org_id = options['org']
+        if org_id and not Organization.objects.filter(pk=org_id).exists():
+            raise CommandError(f'Organization {org_id} does not exist.')
+        count = get_search_backend().rebuild(org_id)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} documents.'))
@@ -0,0 +1,228 @@
+import json
+import math
+import platform
+import subprocess
+from datetime import timedelta
+from time import perf_counter
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import ActivityLog, Comment, Membership, Organization, Task
+from core.utils import membership_cache, organization_cache
+
+# name -> URL template, filled from benchmark_ids(). LabelViewSet is left out
+# because it filters on a Label.organization field that does not exist.
+ENDPOINTS = {
+    'organizations.list': '/api/organizations/',
+    'organizations.retrieve': '/api/organizations/{org}/',
+    'organizations.mine': '/api/organizations/my-organizations/',
+    'projects.list': '/api/projects/',
+    'projects.retrieve': '/api/projects/{project}/',
+    'boards.list': '/api/boards/',
+    'boards.retrieve': '/api/boards/{board}/',
+    'boards.snapshot': '/api/boards/{board}/snapshot/',
+    'columns.list': '/api/columns/',
+    'columns.board': '/api/columns/?board={board}',
+    'columns.retrieve': '/api/columns/{column}/',
+    'tasks.list': '/api/tasks/',
+    'tasks.my_due_this_week': '/api/tasks/?assignee=me&due_after={today}&due_before={week}',
+    'tasks.retrieve': '/api/tasks/{task}/',
+    'tasks.export': '/api/tasks/export/?file_format=ndjson',
+    'comments.list': '/api/comments/?task={task}',
+    'comments.threaded': '/api/comments/?task={task}&threaded=1',
+    'comments.retrieve': '/api/comments/{comment}/?task={task}',
+    'activity_logs.list': '/api/activity-logs/?project={project}',
+    'activity_logs.retrieve': '/api/activity-logs/{log}/',
+    'activity_logs.export': '/api/activity-logs/export/?project={project}&file_format=ndjson',
+    'sync.full': '/api/sync/',
+    'search': '/api/search/?q=login',
+    'analytics.tasks_completed': '/api/analytics/tasks-completed/?org_id={org}',
+    'analytics.member_productivity': '/api/analytics/member-productivity/?org_id={org}',
+    'analytics.missed_deadlines': '/api/analytics/missed-deadlines/?org_id={org}',
+    'analytics.burndown': '/api/analytics/burndown-chart/?org_id={org}&project_id={project}',
+    # Async versions; this client drives them through async_to_sync, so compare under an ASGI server too.
+    'async.tasks.list': '/api/async/tasks/',
+    'async.boards.snapshot': '/api/async/boards/{board}/snapshot/',
+    'async.analytics.tasks_completed': '/api/analytics/async/tasks-completed/?org_id={org}',
+    'async.analytics.burndown': '/api/analytics/async/burndown-chart/?org_id={org}&project_id={project}',
+}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def benchmark_ids(org):
+    # The busiest task gives comment endpoints something to chew on.
+    busiest = Comment.objects.filter(organization=org).values('task_id').annotate(n=Count('id')).order_by('-n').first()
+    if busiest:
+        task = Task.objects.get(pk=busiest['task_id'])
+    else:
+        task = Task.objects.filter(organization=org).order_by('-id').first()
+    if task is None:
+        raise CommandError(f'Organization {org.id} has no tasks; run generate_synthetic_data first.')
+    today = now().date()
+    return {
+        'org': org.id,
+        'project': task.project_id,
+        'board': task.column.board_id,
+        'column': task.column_id,
+        'task': task.id,
+        'comment': Comment.objects.filter(task=task).values_list('id', flat=True).first() or 0,
+        'log': ActivityLog.objects.filter(project_id=task.project_id).values_list('id', flat=True).first() or 0,
+        'today': today.isoformat(),
+        'week': (today + timedelta(days=7)).isoformat(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Time every API endpoint against an organization and save latency, query counts and throughput as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Organization to benchmark (default: the one with most tasks).')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--cold', action='store_true', help='Clear the caches before every request.')
+        parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS), help='Only run these endpoints.')
+        parser.add_argument('--output', help='JSON file to write (default: benchmark-<timestamp>.json).')
+        parser.add_argument('--compare', help='Earlier results file to print the differences against.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        org = self.get_organization(options['org'])
+        admin = Membership.objects.filter(organization=org, role='admin').select_related('user').first()
+        if admin is None:
+            raise CommandError(f'Organization {org.id} has no admin to run the requests as.')
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING('DEBUG is on; every query is also logged, which skews latency.'))
+
+        # A failing endpoint is reported with its status instead of aborting the run.
+        client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin.user)}')
+        session = client.session
+        session['active_org'] = org.id
+        session.save()
+
+        ids = benchmark_ids(org)
+        results = {}
+        # Keep the throttle in the measured path, but at a rate a run never reaches.
+        with mock.patch.dict(UserRateThrottle.THROTTLE_RATES, {'user': '1000000/s'}):
+            for name in options['endpoint'] or ENDPOINTS:
+                results[name] = self.run_endpoint(client, ENDPOINTS[name].format(**ids), options)
+                self.stdout.write(
+                    f"{name:32} p50 {results[name]['p50_ms']:8.2f} ms  p99 {results[name]['p99_ms']:8.2f} ms  "
+                    f"{results[name]['queries']:3} queries  {results[name]['throughput_rps']:8.1f} req/s"
+                )
+
+        report = {
+            'meta': {
+                'timestamp': now().isoformat(),
+                'git_commit': git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cold': options['cold'],
+                'organization': org.id,
+                'dataset': {
+                    'members': org.memberships.count(),
+                    'tasks': Task.objects.filter(organization=org).count(),
+                    'comments': Comment.objects.filter(organization=org).count(),
+                    'activity_logs': ActivityLog.objects.filter(project__organization=org).count(),
+                },
+            },
+            'endpoints': results,
+        }
+        output = options['output'] or f'benchmark-{now():%Y%m%d%H%M%S}.json'
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output}.'))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def get_organization(self, org_id):
+        if org_id:
+            org = Organization.objects.filter(pk=org_id).first()
+        else:
+            busiest = Task.objects.values('organization_id').annotate(n=Count('id')).order_by('-n').first()
+            org = Organization.objects.filter(pk=busiest['organization_id']).first() if busiest else None
+        if org is None:
+            raise CommandError('No organization to benchmark; run generate_synthetic_data first.')
+        return org
+
+    def run_endpoint(self, client, url, options):
+        def request():
+            if options['cold']:
+                cache.clear()
+                organization_cache.clear()
+                membership_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = perf_counter() - start
+            return response.status_code, elapsed, len(queries.captured_queries)
+
+        for _ in range(options['warmup']):
+            request()
+        timings, statuses, query_counts = [], set(), set()
+        for _ in range(options['iterations']):
+            status, elapsed, queries = request()
+            timings.append(elapsed)
+            statuses.add(status)
+            query_counts.add(queries)
+
+        total = sum(timings)
+        timings.sort()
+        return {
+            'url': url,
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+            'mean_ms': round(total / len(timings) * 1000, 3),
+            'max_ms': round(timings[-1] * 1000, 3),
+            'queries': max(query_counts),
+            'throughput_rps': round(len(timings) / total, 1) if total else None,
+        }
+
+    def compare(self, path, results):
+        with open(path) as f:
+            previous = json.load(f)['endpoints']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Compared with {path}'))
+        for name, current in results.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            ratio = current['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+            line = (
+                f"{name:32} p50 {before['p50_ms']:8.2f} -> {current['p50_ms']:8.2f} ms ({ratio:5.2f}x)  "
+                f"queries {before['queries']} -> {current['queries']}"
+            )
+            worse = ratio > 1.2 or current['queries'] > before['queries']
+            self.stdout.write(self.style.WARNING(line) if worse else line)
@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Board = apps.get_model('core', 'Board')
+    Column = apps.get_model('core', 'Column')
+    Task = apps.get_model('core', 'Task')
+
+    boards = Board.objects.filter(pk=OuterRef('board_id'))
+    Column.objects.update(
+        organization_id=Subquery(boards.values('organization_id')[:1]),
+        project_id=Subquery(boards.values('project_id')[:1]),
+    )
+    columns = Column.objects.filter(pk=OuterRef('column_id'))
+    Task.objects.update(
+        organization_id=Subquery(columns.values('organization_id')[:1]),
+        project_id=Subquery(columns.values('project_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_column_task_scope_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
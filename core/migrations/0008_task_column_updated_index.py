@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_require_column_task_scope'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['column', 'updated_at'], name='task_column_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Comment = apps.get_model('core', 'Comment')
+    Task = apps.get_model('core', 'Task')
+
+    tasks = Task.objects.filter(pk=OuterRef('task_id'))
+    Comment.objects.update(organization_id=Subquery(tasks.values('organization_id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_sync_fields_and_tombstones'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_backfill_comment_organization'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='organization',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='core.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='column',
+            index=models.Index(fields=['organization', 'updated_at', 'id'], name='column_org_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['organization', 'updated_at', 'id'], name='comment_org_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['organization', 'updated_at', 'id'], name='task_org_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'core_search_index'
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def create_index(apps, schema_editor):
+    # Other databases fall back to core.search.DatabaseSearchBackend or
+    # whatever SEARCH_BACKEND names.
+    if not fts5_available(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        "org, title, body, kind UNINDEXED, task_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, org, title, body, kind, task_id) "
+        "SELECT id * 2, 'org' || organization_id, title, description, 'task', id FROM core_task"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, org, title, body, kind, task_id) "
+        "SELECT id * 2 + 1, 'org' || organization_id, '', content, 'comment', task_id FROM core_comment"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_require_comment_organization'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
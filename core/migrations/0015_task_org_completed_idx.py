@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_task_position'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['organization', 'completed_at'], name='task_org_completed_idx'),
+        ),
+    ]
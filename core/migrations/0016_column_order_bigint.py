@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_task_org_completed_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='column',
+            name='order',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def scope_labels(apps, schema_editor):
+    # Labels used by tasks of a single organization belong to it; the rest
+    # stay unscoped.
+    Label = apps.get_model('core', 'Label')
+    scoped = (
+        Label.objects.filter(tasks__isnull=False)
+        .values('pk')
+        .annotate(orgs=Count('tasks__organization', distinct=True), org=Max('tasks__organization'))
+        .filter(orgs=1)
+    )
+    for row in scoped:
+        Label.objects.filter(pk=row['pk']).update(organization_id=row['org'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_column_order_bigint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='label',
+            name='organization',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='labels', to='core.organization'),
+        ),
+        migrations.RunPython(scope_labels, migrations.RunPython.noop),
+    ]
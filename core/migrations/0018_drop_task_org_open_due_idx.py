@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_label_organization'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_org_open_due_idx',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 
@@ -48,11 +49,37 @@ class Project(models.Model):
         return self.name
 
 
+def _with_update_fields(kwargs, *names):
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None:
+        kwargs['update_fields'] = {*update_fields, *names}
+
+
 class Board(models.Model):
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='boards')
     name = models.CharField(max_length=255)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='boards')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = not self._state.adding and getattr(self, '_loaded_project_id', self.project_id) != self.project_id
+        super().save(*args, **kwargs)
+        if moved:
+            from .signals import bulk_task_change
+            timestamp = timezone.now()
+            Column.objects.filter(board=self).update(
+                organization_id=self.organization_id, project_id=self.project_id, updated_at=timestamp,
+            )
+            tasks = Task.objects.filter(column__board=self)
+            with bulk_task_change(tasks.values_list('id', flat=True)):
+                tasks.update(organization_id=self.organization_id, project_id=self.project_id, updated_at=timestamp)
+        self._loaded_project_id = self.project_id
+
     def __str__(self):
         return self.name
 
@@ -60,12 +87,54 @@ class Board(models.Model):
 class Column(models.Model):
     name = models.CharField(max_length=100)
     board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='columns')
-    order = models.IntegerField(default=0)
+    order = models.BigIntegerField(default=0)
+    # Copied from the board so columns and tasks can be scoped without joins.
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='columns', editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='columns', editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'order'], name='column_board_order_idx'),
+            models.Index(fields=['organization', 'updated_at', 'id'], name='column_org_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_board_id = instance.__dict__.get('board_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        moved = not self._state.adding and getattr(self, '_loaded_board_id', self.board_id) != self.board_id
+        if update_fields is None or 'board' in update_fields:
+            self.organization_id = self.board.organization_id
+            self.project_id = self.board.project_id
+            _with_update_fields(kwargs, 'organization', 'project')
+        super().save(*args, **kwargs)
+        if moved:
+            from .signals import bulk_task_change
+            with bulk_task_change(self.tasks.values_list('id', flat=True)):
+                self.tasks.update(
+                    organization_id=self.organization_id, project_id=self.project_id, updated_at=timezone.now(),
+                )
+        self._loaded_board_id = self.board_id
 
     def __str__(self):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    def for_organization(self, organization):
+        return self.filter(organization=organization)
+
+    def with_related(self):
+        # Everything TaskSerializer and the object permission checks touch,
+        # in a fixed number of queries regardless of how many tasks match.
+        return self.prefetch_related('assignees', 'labels')
+
+
 class Task(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -73,9 +142,49 @@ class Task(models.Model):
     assignees = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='assigned_tasks')
     due_date = models.DateField(null=True, blank=True)
     priority = models.CharField(max_length=20, choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], default='medium')
-    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True, blank=True, related_name='tasks')
+    # Copied from the column on save so tasks are scoped without joins.
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='tasks', editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Gapped rank within the column, see core.ordering.
+    position = models.BigIntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organization', 'created_at'], name='task_org_created_idx'),
+            models.Index(fields=['organization', 'completed_at'], name='task_org_completed_idx'),
+            models.Index(fields=['column', 'updated_at'], name='task_column_updated_idx'),
+            models.Index(fields=['organization', 'updated_at', 'id'], name='task_org_updated_idx'),
+            models.Index(fields=['organization', 'due_date'], name='task_org_due_idx'),
+            models.Index(fields=['organization', 'priority', 'created_at'], name='task_org_priority_created_idx'),
+            models.Index(fields=['column', 'position'], name='task_column_position_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_column_id = instance.__dict__.get('column_id')
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        stale = (
+            getattr(self, '_loaded_column_id', None) != self.column_id
+            or self.organization_id is None
+            or self.project_id is None
+        )
+        if stale and (update_fields is None or 'column' in update_fields):
+            self.organization_id = self.column.organization_id
+            self.project_id = self.column.project_id
+            _with_update_fields(kwargs, 'organization', 'project')
+        super().save(*args, **kwargs)
+        self._loaded_column_id = self.column_id
+        self._loaded_project_id = self.project_id
 
     def __str__(self):
         return self.title
@@ -84,6 +193,10 @@ class Task(models.Model):
 class Label(models.Model):
     name = models.CharField(max_length=50)
     color = models.CharField(max_length=20)
+    # Null for labels that predate scoping and were never used in a single organization.
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='labels', null=True, blank=True, editable=False,
+    )
     tasks = models.ManyToManyField(Task, related_name='labels', blank=True)
 
     def __str__(self):
@@ -95,21 +208,53 @@ class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # Copied from the task on save so comments are scoped without joins.
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='comments', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+            models.Index(fields=['organization', 'updated_at', 'id'], name='comment_org_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.organization_id is None:
+            self.organization_id = self.task.organization_id
+            _with_update_fields(kwargs, 'organization')
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.task.title}"
 
 
+class Tombstone(models.Model):
+    """Marks a deleted task, column or comment so sync clients can drop it."""
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('column', 'Column'),
+        ('comment', 'Comment'),
+    ]
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organization', 'deleted_at', 'id'], name='tombstone_org_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.deleted_at}"
+
+
 def get_user_role(user, organization):
-    try:
-        membership = Membership.objects.get(user=user, organization=organization)
-        return membership.role
-    except Membership.DoesNotExist:
-        return None
+    from .utils import get_role
+    return get_role(user, organization)
 
 
 class ActivityLog(models.Model):
@@ -127,10 +272,15 @@ class ActivityLog(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True)
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     description = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['project', '-timestamp'], name='activity_project_time_idx'),
+            models.Index(fields=['user', '-timestamp'], name='activity_user_time_idx'),
+            models.Index(fields=['task', '-timestamp'], name='activity_task_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} {self.action} at {self.timestamp}"
@@ -0,0 +1,104 @@
+from django.db.models import Max, Q
+from django.utils.timezone import now
+
+# Siblings are spaced this far apart, so a move can almost always take the
+# midpoint of its new neighbours and write a single row.
+RANK_GAP = 1 << 16
+# Moves to either end push the extreme rank out by a gap each time; past this
+# bound the siblings are respaced, so ranks stay far inside a bigint.
+RANK_LIMIT = 1 << 48
+
+
+def rank_between(before, after):
+    """A rank strictly between two neighbour ranks (either may be None), or None if there is no room."""
+    if before is None and after is None:
+        return RANK_GAP
+    if before is None:
+        rank = after - RANK_GAP
+    elif after is None:
+        rank = before + RANK_GAP
+    elif after - before > 1:
+        rank = (before + after) // 2
+    else:
+        return None
+    return rank if -RANK_LIMIT <= rank <= RANK_LIMIT else None
+
+
+def next_rank(siblings, field):
+    """Rank that appends after every row of ``siblings``, respacing them if the end is out of bounds."""
+    last = siblings.aggregate(last=Max(field))['last']
+    if last is None:
+        return RANK_GAP
+    if last + RANK_GAP > RANK_LIMIT:
+        return (len(rebalance(siblings, field)) + 1) * RANK_GAP
+    return last + RANK_GAP
+
+
+def rebalance(siblings, field, pinned=None):
+    """Respace ``siblings`` RANK_GAP apart in their current order with one bulk update.
+
+    ``pinned`` (an instance of the same model) is left out so the caller can
+    place it into the fresh gaps.
+    """
+    rows = siblings.order_by(field, 'id').only('id', field)
+    if pinned is not None:
+        rows = rows.exclude(pk=pinned.pk)
+    return respace(list(rows), field)
+
+
+def respace(rows, field):
+    """Give ``rows`` ranks RANK_GAP apart in list order, in one bulk update.
+
+    Only ranks and ``updated_at`` change, which none of the task signal
+    receivers (analytics, search) track, so no bulk-change signal is sent.
+    """
+    if not rows:
+        return rows
+    timestamp = now()
+    for i, row in enumerate(rows, start=1):
+        setattr(row, field, i * RANK_GAP)
+        row.updated_at = timestamp
+    type(rows[0]).objects.bulk_update(rows, [field, 'updated_at'], batch_size=1000)
+    return rows
+
+
+def _neighbours(siblings, field, instance, after):
+    others = siblings.exclude(pk=instance.pk).order_by(field, 'id')
+    if after is None:
+        return None, others.values_list(field, flat=True).first()
+    rank = getattr(after, field)
+    following = others.filter(Q(**{f'{field}__gt': rank}) | Q(**{field: rank, 'pk__gt': after.pk}))
+    return rank, following.values_list(field, flat=True).first()
+
+
+def move(instance, siblings, field, after=None):
+    """Place ``instance`` right after ``after`` among ``siblings`` (first when None).
+
+    Writes only ``instance`` unless its new neighbours have no room left,
+    in which case the siblings are respaced first.
+    """
+    before_rank, after_rank = _neighbours(siblings, field, instance, after)
+    rank = rank_between(before_rank, after_rank)
+    if rank is None:
+        # The respaced rows are in sibling order, so the new neighbours are read off them.
+        rows = rebalance(siblings, field, pinned=instance)
+        index = 0 if after is None else next(i for i, row in enumerate(rows) if row.pk == after.pk) + 1
+        before_rank = getattr(rows[index - 1], field) if index else None
+        after_rank = getattr(rows[index], field) if index < len(rows) else None
+        if after is not None:
+            setattr(after, field, before_rank)
+        rank = rank_between(before_rank, after_rank)
+    setattr(instance, field, rank)
+    return rank
+
+
+def place(instance, siblings, field, rank=None):
+    """Put ``instance`` where ``rank`` sorts among ``siblings`` (last when None) and return its new rank.
+
+    A requested rank only picks the position: the stored one is taken from
+    the gaps around it like any move, so siblings stay evenly spaced.
+    """
+    others = siblings.exclude(pk=instance.pk).order_by(f'-{field}', '-id')
+    if rank is not None:
+        others = others.filter(**{f'{field}__lte': rank})
+    return move(instance, siblings, field, others.first())
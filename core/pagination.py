@@ -0,0 +1,101 @@
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination; each subclass orders on an indexed column plus ``id``."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+
+    # DRF's paginate_queryset, split around the one query so async views can
+    # fetch the page through the async ORM and share everything else.
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self._window(queryset, request, view)
+        return None if window is None else self._paginate(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self._window(queryset, request, view)
+        return None if window is None else self._paginate([item async for item in window])
+
+    def _window(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip('-')
+            if self.cursor.reverse != order.startswith('-'):
+                queryset = queryset.filter(**{order_attr + '__lt': current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + '__gt': current_position})
+
+        self._offset, self._reverse, self._current_position = offset, reverse, current_position
+        # One extra row tells whether a following page exists.
+        return queryset[offset:offset + self.page_size + 1]
+
+    def _paginate(self, results):
+        offset, reverse, current_position = self._offset, self._reverse, self._current_position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_data(self, data):
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+
+
+class CreatedAtCursorPagination(IdCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class TimestampCursorPagination(IdCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class ColumnOrderCursorPagination(IdCursorPagination):
+    ordering = ('order', 'id')
+
+
+class CommentCursorPagination(IdCursorPagination):
+    ordering = ('created_at', 'id')
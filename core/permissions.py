@@ -1,15 +1,35 @@
 from rest_framework import permissions
-from .models import Membership
+from .models import Organization
+from .utils import get_role
 
-class IsOrganizationAdmin(permissions.BasePermission):
-    def has_object_permission(self, request, view, obj):
-        return Membership.objects.filter(user=request.user, organization=obj.organization, role='admin').exists()
 
-class IsManagerOrAdmin(permissions.BasePermission):
-    def has_object_permission(self, request, view, obj):
-        return Membership.objects.filter(user=request.user, organization=obj.organization, role__in=['admin', 'manager']).exists()
+def get_organization_id(obj):
+    """Organization id owning ``obj``, following the column/board/task chain."""
+    if isinstance(obj, Organization):
+        return obj.pk
+    org_id = getattr(obj, 'organization_id', None)
+    if org_id is not None:
+        return org_id
+    for parent in ('column', 'board', 'project', 'task'):
+        if getattr(obj, parent + '_id', None) is not None:
+            return get_organization_id(getattr(obj, parent))
+    return None
+
+
+class OrganizationRolePermission(permissions.BasePermission):
+    roles = None
 
-class IsMember(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return Membership.objects.filter(user=request.user, organization=obj.organization).exists()
-    
+        role = get_role(request.user, get_organization_id(obj), request=request)
+        if role is None:
+            return False
+        return self.roles is None or role in self.roles
+
+class IsOrganizationAdmin(OrganizationRolePermission):
+    roles = ('admin',)
+
+class IsManagerOrAdmin(OrganizationRolePermission):
+    roles = ('admin', 'manager')
+
+class IsMember(OrganizationRolePermission):
+    pass
@@ -0,0 +1,59 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .models import Column, Comment, Task
+
+
+def board_group_name(board_id):
+    return f'board.{board_id}'
+
+
+def board_event(kind, action, object_id, data=None):
+    return {'kind': kind, 'action': action, 'id': object_id, 'data': data}
+
+
+def coalesce_events(events):
+    """Collapse a burst to one event per object, keeping the latest data.
+
+    ``created`` followed by updates stays ``created``; an object created and
+    deleted inside the same burst disappears entirely.
+    """
+    latest = {}
+    for event in events:
+        key = (event['kind'], event['id'])
+        previous = latest.pop(key, None)
+        if previous is not None and previous['action'] == 'created':
+            if event['action'] == 'deleted':
+                continue
+            event = {**event, 'action': 'created'}
+        latest[key] = event
+    return list(latest.values())
+
+
+def _send(board_id, events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not events:
+        return
+    async_to_sync(channel_layer.group_send)(
+        board_group_name(board_id),
+        {'type': 'board.events', 'events': coalesce_events(events)},
+    )
+
+
+def publish_board_events(board_id, events):
+    """Push events to a board's subscribers once the current transaction commits."""
+    if board_id is None:
+        return
+    events = list(events)
+    transaction.on_commit(lambda: _send(board_id, events))
+
+
+def get_board_id(instance):
+    if isinstance(instance, Column):
+        return instance.board_id
+    if isinstance(instance, Task):
+        return Column.objects.filter(pk=instance.column_id).values_list('board_id', flat=True).first()
+    if isinstance(instance, Comment):
+        return Task.objects.filter(pk=instance.task_id).values_list('column__board_id', flat=True).first()
+    return None
@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = 'replica'
+# Set on a client after it writes; while present its reads stay on the primary.
+PIN_COOKIE = 'db_pin_primary'
+
+_read_alias = ContextVar('core_read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+
+def _may_read_replica(request):
+    return replica_configured() and request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+
+def _primary_in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def read_alias(request):
+    """The alias this request should read from: the replica, unless it writes or the client just wrote.
+
+    Reads inside an open transaction on the primary stay there too, so they
+    see its uncommitted writes.
+    """
+    if not _may_read_replica(request) or _primary_in_transaction():
+        return DEFAULT_DB_ALIAS
+    return REPLICA_ALIAS
+
+
+async def aread_alias(request):
+    # The transaction state belongs to the sync thread the async ORM runs in.
+    if not _may_read_replica(request) or await sync_to_async(_primary_in_transaction)():
+        return DEFAULT_DB_ALIAS
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def reading_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Writes go to the primary; reads go wherever ``reading_from`` points, the primary by default."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaReadMixin:
+    """Serves a view's safe requests from the replica when one is configured.
+
+    Querysets from ``get_queryset`` are bound to the alias up front, so
+    streaming responses consumed after ``dispatch`` returns stay on it too.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with reading_from(read_alias(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return super().get_queryset().using(_read_alias.get())
+
+
+class ReplicaPinningMiddleware:
+    """Pins a client to the primary for ``DATABASE_REPLICA_PIN_SECONDS`` after a successful write.
+
+    Covers replication lag, so a client always reads its own writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if replica_configured() and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,176 @@
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Task
+
+SEARCH_TABLE = 'core_search_index'
+BATCH_SIZE = 1000
+
+# FTS5 has no unique constraints, so every document gets a fixed rowid:
+# updates and deletes then hit the rowid b-tree instead of scanning the table.
+ROWID_KINDS = {'task': 0, 'comment': 1}
+
+
+def document_rowid(kind, pk):
+    return pk * 2 + ROWID_KINDS[kind]
+
+
+def organization_token(org_id):
+    return f'org{org_id}'
+
+
+def task_documents(tasks):
+    return [('task', t.pk, t.organization_id, t.pk, t.title, t.description) for t in tasks]
+
+
+def comment_documents(comments):
+    return [('comment', c.pk, c.organization_id, c.task_id, '', c.content) for c in comments]
+
+
+def _terms(query):
+    return re.findall(r'\w+', query)
+
+
+class SearchBackend(ABC):
+    """Interface of a search backend; indexing is a no-op unless overridden."""
+
+    def index(self, documents):
+        pass
+
+    def remove(self, kind, ids):
+        pass
+
+    def rebuild(self, organization_id=None):
+        return 0
+
+    @abstractmethod
+    def search(self, organization_id, query, limit, offset):
+        """Hits of ``query`` in the organization, best first."""
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Unindexed ``icontains`` matching for databases without a full-text table.
+
+    Nothing is ranked: every hit scores 0.0 and they come newest first.
+    """
+
+    def search(self, organization_id, query, limit, offset):
+        terms = _terms(query)
+        if not terms:
+            return []
+        task_q, comment_q = Q(), Q()
+        for term in terms:
+            task_q &= Q(title__icontains=term) | Q(description__icontains=term)
+            comment_q &= Q(content__icontains=term)
+        tasks = Task.objects.filter(task_q, organization_id=organization_id).order_by('-updated_at', '-id')
+        comments = Comment.objects.filter(comment_q, organization_id=organization_id).order_by('-updated_at', '-id')
+        hits = [
+            {'kind': 'task', 'id': pk, 'task': pk, 'snippet': title, 'rank': 0.0}
+            for pk, title in tasks.values_list('id', 'title')[:offset + limit]
+        ] + [
+            {'kind': 'comment', 'id': pk, 'task': task_id, 'snippet': content[:200], 'rank': 0.0}
+            for pk, task_id, content in comments.values_list('id', 'task_id', 'content')[:offset + limit]
+        ]
+        return hits[offset:offset + limit]
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """SQLite FTS5 index over task titles, descriptions and comment bodies.
+
+    The organization is stored as a token in its own column and ANDed into
+    every match, so the full-text index itself does the org scoping.
+    """
+    # bm25 weights for the org, title and body columns.
+    WEIGHTS = (0.0, 10.0, 1.0)
+
+    def index(self, documents):
+        if not documents:
+            return
+        rows = [
+            (document_rowid(kind, pk), organization_token(org_id), title, body, kind, task_id)
+            for kind, pk, org_id, task_id, title, body in documents
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, org, title, body, kind, task_id) VALUES (%s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, kind, ids):
+        if not ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(document_rowid(kind, pk),) for pk in ids])
+
+    def rebuild(self, organization_id=None):
+        tasks = Task.objects.order_by()
+        comments = Comment.objects.order_by()
+        with connection.cursor() as cursor:
+            if organization_id is None:
+                cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            else:
+                tasks = tasks.filter(organization_id=organization_id)
+                comments = comments.filter(organization_id=organization_id)
+                cursor.execute(
+                    f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN '
+                    f'(SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s)',
+                    [f'org:{organization_token(organization_id)}'],
+                )
+        count = 0
+        for build, queryset in ((task_documents, tasks), (comment_documents, comments)):
+            batch = []
+            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) >= BATCH_SIZE:
+                    self.index(build(batch))
+                    count += len(batch)
+                    batch = []
+            self.index(build(batch))
+            count += len(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+        return count
+
+    def search(self, organization_id, query, limit, offset):
+        terms = _terms(query)
+        if not terms:
+            return []
+        # Quote every term so user input is never parsed as FTS syntax; the
+        # last one matches as a prefix for search-as-you-type.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        match = f'org:{organization_token(organization_id)} AND {{title body}}: ({match})'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, kind, task_id, snippet({SEARCH_TABLE}, -1, '[', ']', '...', 12), "
+                f"bm25({SEARCH_TABLE}, {', '.join(map(str, self.WEIGHTS))}) AS rank "
+                f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            return [
+                {'kind': kind, 'id': rowid // 2, 'task': task_id, 'snippet': snippet, 'rank': rank}
+                for rowid, kind, task_id, snippet, rank in cursor.fetchall()
+            ]
+
+
+def fts_table_exists():
+    return connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names()
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """``settings.SEARCH_BACKEND`` if set, else FTS5 where its table exists.
+
+    The choice is cached until the next ``migrate`` (see CoreConfig.ready),
+    which may create the table.
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return SQLiteFTSBackend() if fts_table_exists() else DatabaseSearchBackend()
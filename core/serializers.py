@@ -1,53 +1,79 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import *
+from .instrumentation import SerializerTimingMixin
+from .sqlite import write_transaction
 
 User = get_user_model()  
 
-class UserSerializer(serializers.ModelSerializer):
+
+def requested_fields(request, available):
+    """The names in ``?fields=a,b`` that are among ``available``, or None to keep them all."""
+    if request is None or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return None
+    requested = request.query_params.get('fields')
+    if not requested:
+        return None
+    return ({name.strip() for name in requested.split(',')} & set(available)) or None
+
+
+class SparseFieldsetMixin:
+    """Restrict read responses to the fields named in ``?fields=a,b``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'), self.fields)
+        if not wanted:
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class UserSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class MembershipSerializer(serializers.ModelSerializer):
+class MembershipSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = Membership
         fields = ['id', 'user', 'role', 'organization']
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     memberships = MembershipSerializer(source='membership_set', many=True, read_only=True)
     class Meta:
         model = Organization
         fields = ['id', 'name', 'created_at', 'memberships']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = ['id', 'name', 'description', 'organization', 'created_at']
 
-class BoardSerializer(serializers.ModelSerializer):
+class BoardSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Board
         fields = ['id', 'name', 'project']
 
-class ColumnSerializer(serializers.ModelSerializer):
+class ColumnSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Column
         fields = ['id', 'name', 'board', 'order']
 
-class LabelSerializer(serializers.ModelSerializer):
+class LabelSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Label
         fields = ['id', 'name', 'color']
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     assignees = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True)
     labels = serializers.PrimaryKeyRelatedField(queryset=Label.objects.all(), many=True, required=False)
 
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'column', 'assignees', 'due_date', 'priority', 'created_at', 'updated_at', 'labels']
+        fields = ['id', 'title', 'description', 'column', 'position', 'assignees', 'due_date', 'priority', 'created_at', 'updated_at', 'completed_at', 'labels']
+        read_only_fields = ['position']
 
     def create(self, validated_data):
         assignees = validated_data.pop('assignees', [])
@@ -57,7 +83,10 @@ class TaskSerializer(serializers.ModelSerializer):
         task.labels.set(labels)
         return task
 
+    @write_transaction
     def update(self, instance, validated_data):
+        # A locked write runs this again with the same dict, so leave it whole.
+        validated_data = dict(validated_data)
         assignees = validated_data.pop('assignees', None)
         labels = validated_data.pop('labels', None)
         for attr, value in validated_data.items():
@@ -77,7 +106,7 @@ class RecursiveField(serializers.Serializer):
 
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
 
@@ -86,10 +115,18 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'task', 'user', 'content', 'parent', 'created_at', 'replies']
 
     def get_replies(self, obj):
-        return CommentSerializer(obj.replies.all(), many=True).data
-
-
-class ActivityLogSerializer(serializers.ModelSerializer):
+        children = self.context.get('comment_children')
+        if children is None:
+            return CommentSerializer(obj.replies.all(), many=True).data
+        # Threaded mode: replies come from the in-memory tree built by the view.
+        depth = self.context.get('comment_depth', 0) + 1
+        if depth > self.context['comment_max_depth']:
+            return []
+        context = {**self.context, 'comment_depth': depth}
+        return CommentSerializer(children.get(obj.id, []), many=True, context=context).data
+
+
+class ActivityLogSerializer(SerializerTimingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     task = serializers.StringRelatedField()
     project = serializers.StringRelatedField()
@@ -99,19 +136,20 @@ class ActivityLogSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TasksCompletedSerializer(serializers.Serializer):
+class TasksCompletedSerializer(SerializerTimingMixin, serializers.Serializer):
     date = serializers.DateField()
     completed_tasks_count = serializers.IntegerField()
 
-class MemberProductivitySerializer(serializers.Serializer):
+class MemberProductivitySerializer(SerializerTimingMixin, serializers.Serializer):
     user_id = serializers.IntegerField()
     user_name = serializers.CharField()
     completed_tasks_count = serializers.IntegerField()
+    pending_tasks_count = serializers.IntegerField()
 
-class MissedDeadlinesSerializer(serializers.Serializer):
+class MissedDeadlinesSerializer(SerializerTimingMixin, serializers.Serializer):
     date = serializers.DateField()
     missed_tasks_count = serializers.IntegerField()
 
-class BurndownChartSerializer(serializers.Serializer):
+class BurndownChartSerializer(SerializerTimingMixin, serializers.Serializer):
     date = serializers.DateField()
     remaining_tasks_count = serializers.IntegerField()
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils.timezone import now
+
+from .models import Column, Comment, Label, Membership, Organization, Task, Tombstone
+from .search import comment_documents, get_search_backend, task_documents
+from .tagged_cache import invalidate_tags, members_tag, organization_tag, project_tag
+from .utils import bump_role_version, membership_cache, organization_cache
+
+# Sent before task writes that bypass model signals (bulk_create, bulk_update,
+# queryset.update). Receivers get the ids of existing tasks about to change and
+# may return a callable, which is called with the ids of every affected task
+# (including newly created ones) once the write is done.
+tasks_bulk_changing = Signal()
+
+
+@contextmanager
+def bulk_task_change(task_ids):
+    task_ids = list(task_ids)
+    responses = tasks_bulk_changing.send(sender=Task, task_ids=task_ids)
+    created_ids = []
+    yield created_ids
+    for _, callback in responses:
+        if callable(callback):
+            callback(task_ids + created_ids)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_cache(sender, instance, **kwargs):
+    organization_cache.delete(instance.id)
+    membership_cache.delete_where(lambda key: key[1] == instance.id)
+    bump_role_version(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def invalidate_membership_cache(sender, instance, **kwargs):
+    membership_cache.delete((instance.user_id, instance.organization_id))
+    bump_role_version(instance.organization_id)
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def invalidate_member_analytics(sender, instance, **kwargs):
+    invalidate_tags(organization_tag(instance.organization_id), members_tag(instance.organization_id))
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_task_analytics(sender, instance, **kwargs):
+    invalidate_tags(
+        organization_tag(instance.organization_id),
+        project_tag(instance.project_id),
+        project_tag(getattr(instance, '_loaded_project_id', None) or instance.project_id),
+    )
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def invalidate_assignment_analytics(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_tags(organization_tag(instance.organization_id), project_tag(instance.project_id))
+    elif pk_set:
+        _invalidate_task_scopes(Task.objects.filter(pk__in=pk_set).values_list('organization_id', 'project_id').distinct())
+    else:
+        # user.assigned_tasks.clear() does not say which tasks were affected.
+        org_ids = instance.memberships.values_list('organization_id', flat=True)
+        invalidate_tags(*[tag for org_id in org_ids for tag in (organization_tag(org_id), members_tag(org_id))])
+
+
+def _invalidate_task_scopes(scopes):
+    tags = set()
+    for org_id, project_id in scopes:
+        tags.update((organization_tag(org_id), project_tag(project_id)))
+    invalidate_tags(*tags)
+
+
+@receiver(tasks_bulk_changing, sender=Task)
+def invalidate_bulk_task_analytics(sender, task_ids, **kwargs):
+    before = list(Task.objects.filter(pk__in=task_ids).values_list('organization_id', 'project_id').distinct())
+
+    def after(final_ids):
+        after = Task.objects.filter(pk__in=final_ids).values_list('organization_id', 'project_id').distinct()
+        _invalidate_task_scopes(before + list(after))
+    return after
+
+
+def deletion_batch(instance, origin):
+    """Where receivers keep state shared by everything one ``delete()`` removes.
+
+    That is the deleted instance or queryset (``origin``), or ``instance``
+    itself when there is none. Django sends every pre_delete of a deletion
+    before its first post_delete, so pre_delete receivers can collect per
+    instance and the first post_delete write for the whole cascade at once.
+    """
+    return instance if origin is None else origin
+
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Column)
+@receiver(pre_delete, sender=Comment)
+def collect_tombstone(sender, instance, origin=None, **kwargs):
+    # Tombstones of a deleted organization would be cascaded away with it.
+    if isinstance(origin, Organization) or getattr(origin, 'model', None) is Organization:
+        return
+    deletion_batch(instance, origin).__dict__.setdefault('_tombstones', []).append(Tombstone(
+        organization_id=instance.organization_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk,
+    ))
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Column)
+@receiver(post_delete, sender=Comment)
+def record_tombstones(sender, instance, origin=None, **kwargs):
+    tombstones = deletion_batch(instance, origin).__dict__.pop('_tombstones', None)
+    if tombstones:
+        Tombstone.objects.bulk_create(tombstones)
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+@receiver(m2m_changed, sender=Label.tasks.through)
+def touch_tasks_on_m2m_change(sender, instance, action, pk_set, **kwargs):
+    # Assignees and labels are part of a synced task, so changing them moves
+    # the task's updated_at forward like any other edit.
+    if isinstance(instance, Task):
+        task_ids = [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else None
+    elif action == 'pre_clear':
+        instance._cleared_task_ids = list(
+            sender.objects.filter(**{instance._meta.model_name: instance}).values_list('task_id', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        task_ids = instance.__dict__.pop('_cleared_task_ids', None)
+    else:
+        task_ids = pk_set if action in ('post_add', 'post_remove') else None
+    if task_ids:
+        Task.objects.filter(pk__in=task_ids).update(updated_at=now())
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, **kwargs):
+    get_search_backend().index(task_documents([instance]))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    get_search_backend().index(comment_documents([instance]))
+
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Comment)
+def collect_unindexed_document(sender, instance, origin=None, **kwargs):
+    unindexed = deletion_batch(instance, origin).__dict__.setdefault('_unindexed', {})
+    unindexed.setdefault(sender._meta.model_name, []).append(instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def unindex_documents(sender, instance, origin=None, **kwargs):
+    unindexed = deletion_batch(instance, origin).__dict__.pop('_unindexed', None)
+    for kind, ids in (unindexed or {}).items():
+        get_search_backend().remove(kind, ids)
+
+
+@receiver(tasks_bulk_changing, sender=Task)
+def index_bulk_tasks(sender, task_ids, **kwargs):
+    def after(final_ids):
+        get_search_backend().index(task_documents(
+            Task.objects.filter(pk__in=final_ids).only('id', 'organization_id', 'title', 'description')
+        ))
+    return after
@@ -0,0 +1,49 @@
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _option(name, default):
+    return getattr(settings, 'SQLITE_WRITE_RETRIES', {}).get(name, default)
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def write_transaction(func=None, *, using=DEFAULT_DB_ALIAS):
+    """Run ``func`` in a transaction, retried with jittered backoff while SQLite reports the database locked.
+
+    SQLite has a single writer, so concurrent workers queue here instead of
+    failing the request. With ``transaction_mode`` IMMEDIATE the write lock is
+    taken at BEGIN, so a locked attempt has written nothing yet. Inside an
+    outer transaction the lock is already held and ``func`` runs once.
+    """
+    if func is None:
+        return lambda func: write_transaction(func, using=using)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if connections[using].in_atomic_block:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        attempts, backoff = _option('ATTEMPTS', 5), _option('BACKOFF', 0.05)
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == attempts or not is_locked_error(exc):
+                    raise
+                delay = backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.info('%s hit a locked database, retry %d in %.3fs.', func.__qualname__, attempt, delay)
+                time.sleep(delay)
+
+    return wrapper
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from .models import Column, Comment, Task, Tombstone
+from .serializers import ColumnSerializer, CommentSerializer, TaskSerializer
+
+_options = getattr(settings, 'SYNC', {})
+PAGE_SIZE = _options.get('PAGE_SIZE', 200)
+MAX_PAGE_SIZE = _options.get('MAX_PAGE_SIZE', 1000)
+# Rows stamped this recently may belong to transactions that have not
+# committed yet. Cursors never move past the window, so such rows are read
+# again on the next call (re-sending an upsert is harmless) instead of skipped.
+SETTLE_WINDOW = timedelta(seconds=_options.get('SETTLE_SECONDS', 2))
+TOMBSTONE_RETENTION = timedelta(days=_options.get('TOMBSTONE_RETENTION_DAYS', 30))
+
+TOKEN_SALT = 'core.sync'
+
+# feed -> (queryset for an organization, change timestamp field)
+FEEDS = {
+    'tasks': (lambda org: Task.objects.for_organization(org).with_related(), 'updated_at'),
+    'columns': (lambda org: Column.objects.filter(organization=org), 'updated_at'),
+    'comments': (lambda org: Comment.objects.filter(organization=org).select_related('user'), 'updated_at'),
+    'deleted': (lambda org: Tombstone.objects.filter(organization=org), 'deleted_at'),
+}
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token is older than the tombstone retention; start a full sync without a token.'
+    default_code = 'sync_token_expired'
+
+
+def _load_token(token, organization):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise serializers.ValidationError({'token': 'Invalid sync token.'})
+    if payload.get('org') != organization.id:
+        raise serializers.ValidationError({'token': 'Sync token belongs to another organization.'})
+    cursors = {}
+    for feed, cursor in payload['cursors'].items():
+        cursors[feed] = (parse_datetime(cursor[0]), cursor[1]) if cursor else None
+    if cursors['deleted'][0] < now() - TOMBSTONE_RETENTION:
+        raise SyncTokenExpired()
+    return cursors
+
+
+def _dump_token(cursors, organization):
+    return signing.dumps({
+        'org': organization.id,
+        'cursors': {feed: [c[0].isoformat(), c[1]] if c else None for feed, c in cursors.items()},
+    }, salt=TOKEN_SALT, compress=True)
+
+
+def _read_page(queryset, field, cursor, limit):
+    if cursor is not None:
+        # The leading range keeps the (organization, field, id) index usable;
+        # the OR only breaks ties on rows sharing the cursor's timestamp.
+        timestamp, pk = cursor
+        queryset = queryset.filter(**{f'{field}__gte': timestamp}).filter(
+            Q(**{f'{field}__gt': timestamp}) | Q(pk__gt=pk)
+        )
+    rows = list(queryset.order_by(field, 'id')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def changes_since(organization, token=None, limit=PAGE_SIZE, context=None):
+    """Upserts and deletions of tasks, columns and comments after ``token``.
+
+    Every feed is read over its (organization, timestamp, id) index from its
+    own cursor, so the work done depends on the number of changes rather than
+    the size of the organization. Without a token, all live rows are returned
+    and deletions are tracked from now on. ``has_more`` means the caller
+    should ask again right away with the returned token.
+    """
+    horizon = now() - SETTLE_WINDOW
+    if token:
+        cursors = _load_token(token, organization)
+    else:
+        cursors = {feed: None for feed in FEEDS}
+        cursors['deleted'] = (horizon, 0)
+
+    context = {**(context or {}), 'comment_children': {}, 'comment_max_depth': 0}
+    data, has_more = {}, False
+    for feed, (queryset, field) in FEEDS.items():
+        rows, more = _read_page(queryset(organization), field, cursors[feed], limit)
+        last = (getattr(rows[-1], field), rows[-1].pk) if rows else cursors[feed]
+        if not more and (last is None or last[0] > horizon):
+            last = (horizon, 0)
+        cursors[feed] = last
+        has_more = has_more or more
+        data[feed] = rows
+
+    return {
+        'tasks': TaskSerializer(data['tasks'], many=True, context=context).data,
+        'columns': ColumnSerializer(data['columns'], many=True, context=context).data,
+        'comments': CommentSerializer(data['comments'], many=True, context=context).data,
+        'deleted': [
+            {'kind': tombstone.kind, 'id': tombstone.object_id, 'deleted_at': tombstone.deleted_at}
+            for tombstone in data['deleted']
+        ],
+        'token': _dump_token(cursors, organization),
+        'has_more': has_more,
+    }
+
+
+def prune_tombstones(older_than=TOMBSTONE_RETENTION):
+    """Delete tombstones no sync token can still ask for; returns how many."""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=now() - older_than).delete()
+    return deleted
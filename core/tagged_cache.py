@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300)
+
+
+def _tag_key(tag):
+    return f'core:tag:{tag}'
+
+
+def tag_versions(tags):
+    """Current version of each tag, creating versions for tags never seen before."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def atag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Make every entry stored under any of ``tags`` unreachable."""
+    version = time.time_ns()
+    cache.set_many({_tag_key(tag): version for tag in tags if tag}, None)
+
+
+def organization_tag(org_id):
+    return f'org:{org_id}'
+
+
+def members_tag(org_id):
+    return f'members:{org_id}'
+
+
+def project_tag(project_id):
+    return f'project:{project_id}'
+
+
+def analytics_tags(org_id, project_id=None):
+    # Organization-wide results change with any task in the organization; a
+    # project's results only with its own tasks (and the member list).
+    if project_id:
+        return [project_tag(project_id), members_tag(org_id)]
+    return [organization_tag(org_id)]
+
+
+def _matches(if_none_match, etag):
+    return any(value.strip() in (etag, '*', 'W/' + etag) for value in if_none_match.split(','))
+
+
+def _entry(view, request, versions):
+    """Cache key and response headers of an analytics request, given its tag versions."""
+    params = sorted((name, value) for name, value in request.query_params.items() if name != 'format')
+    # Default date ranges are relative to today, so the day is part of the key.
+    raw_key = repr((view, params, now().date().isoformat(), versions))
+    digest = hashlib.sha1(raw_key.encode()).hexdigest()
+    etag = f'"{digest}"'
+    return f'core:analytics:{digest}', {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+
+def cached_analytics(view_get):
+    """Cache an analytics ``APIView.get`` by org, project and query parameters.
+
+    Entries are tagged per organization/project and dropped when those tags are
+    invalidated (see core.signals). Responses carry an ETag derived from the key
+    and tag versions, so a matching ``If-None-Match`` gets a 304 from the cache
+    alone. Requests without ``org_id`` or from non-members fall through to the
+    view, which reports the error.
+    """
+    from .analytics import is_member_of_organization
+
+    @wraps(view_get)
+    def get(self, request, *args, **kwargs):
+        org_id = request.query_params.get('org_id')
+        project_id = request.query_params.get('project_id')
+        if not org_id or not is_member_of_organization(request.user, org_id, request):
+            return view_get(self, request, *args, **kwargs)
+
+        key, headers = _entry(type(self).__name__, request, tag_versions(analytics_tags(org_id, project_id)))
+        if _matches(request.headers.get('If-None-Match', ''), headers['ETag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers=headers)
+
+        response = view_get(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, ANALYTICS_CACHE_TIMEOUT)
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    return get
+
+
+def acached_analytics(view_get):
+    """``cached_analytics`` for the async views in core.async_views; both share cache entries."""
+    from .utils import aget_role
+
+    @wraps(view_get)
+    async def get(self, request, *args, **kwargs):
+        org_id = request.query_params.get('org_id')
+        project_id = request.query_params.get('project_id')
+        if not org_id:
+            return await view_get(self, request, *args, **kwargs)
+        role, versions = await asyncio.gather(
+            aget_role(request.user, org_id, request), atag_versions(analytics_tags(org_id, project_id)),
+        )
+        if role is None:
+            return await view_get(self, request, *args, **kwargs)
+
+        key, headers = _entry(self.cache_name, request, versions)
+        if _matches(request.headers.get('If-None-Match', ''), headers['ETag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = await cache.aget(key)
+        if data is not None:
+            return Response(data, headers=headers)
+
+        response = await view_get(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, ANALYTICS_CACHE_TIMEOUT)
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    return get
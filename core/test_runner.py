@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with query budgets enforced, so a view outgrowing its budget fails the tests that call it."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._enforce_budgets = override_settings(
+            INSTRUMENTATION={**getattr(settings, 'INSTRUMENTATION', {}), 'ENFORCE_BUDGETS': True},
+        )
+        self._enforce_budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._enforce_budgets.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1169 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import OperationalError, connection, connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import *
+from . import ordering
+from .activity import activity_log_buffer, flush_activity_log
+from .consumers import BoardConsumer
+from .instrumentation import QueryBudgetExceeded, registry
+from .realtime import board_event, board_group_name
+from .renderers import FastJSONRenderer, orjson
+from .replicas import PIN_COOKIE, REPLICA_ALIAS, PrimaryReplicaRouter, read_alias, reading_from, replica_configured
+from .routing import websocket_urlpatterns
+from .search import DatabaseSearchBackend, SearchBackend, SQLiteFTSBackend, get_search_backend
+from .serializers import TaskSerializer
+from .sqlite import write_transaction
+from .urls import router, urlpatterns as core_urlpatterns
+from .utils import (
+    aget_organization, get_membership, get_organization, get_role, log_activity, membership_cache, organization_cache,
+)
+
+
+class OrganizationAPITestCase(APITestCase):
+    """Authenticated client with an active organization, project, board and column."""
+
+    def setUp(self):
+        cache.clear()
+        organization_cache.clear()
+        membership_cache.clear()
+
+        self.user = CustomUser.objects.create_user('owner')
+        self.organization = Organization.objects.create(name='Acme')
+        Membership.objects.create(user=self.user, organization=self.organization, role='admin')
+        self.project = Project.objects.create(name='Platform', organization=self.organization)
+        self.board = Board.objects.create(name='Sprint', project=self.project, organization=self.organization)
+        self.column = Column.objects.create(name='To do', board=self.board)
+
+        self.client.force_authenticate(self.user)
+        session = self.client.session
+        session['active_org'] = self.organization.id
+        session.save()
+
+    def create_tasks(self, count):
+        labels = [Label.objects.create(name=f'label-{i}', color='red', organization=self.organization) for i in range(2)]
+        tasks = []
+        for i in range(count):
+            task = Task.objects.create(title=f'Task {i}', column=self.column)
+            task.assignees.add(self.user)
+            task.labels.set(labels)
+            tasks.append(task)
+        return tasks
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+
+class TaskQueryCountTests(OrganizationAPITestCase):
+
+    def test_list_query_count_is_constant(self):
+        self.create_tasks(2)
+        self.count_queries('/api/tasks/')
+        baseline = self.count_queries('/api/tasks/')
+
+        self.create_tasks(25)
+        with self.assertNumQueries(baseline):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(len(response.data['results']), 27)
+        self.assertEqual(len(response.data['results'][0]['labels']), 2)
+
+    def test_retrieve_query_count_is_constant(self):
+        task = self.create_tasks(1)[0]
+        self.count_queries(f'/api/tasks/{task.id}/')
+        baseline = self.count_queries(f'/api/tasks/{task.id}/')
+
+        for i in range(10):
+            task.assignees.add(CustomUser.objects.create_user(f'user-{i}'))
+        with self.assertNumQueries(baseline):
+            response = self.client.get(f'/api/tasks/{task.id}/')
+        self.assertEqual(len(response.data['assignees']), 11)
+
+
+class PaginationTests(OrganizationAPITestCase):
+
+    def test_task_list_pages_with_cursor(self):
+        tasks = self.create_tasks(5)
+        response = self.client.get('/api/tasks/', {'page_size': 2})
+        self.assertEqual([t['id'] for t in response.data['results']], [tasks[4].id, tasks[3].id])
+
+        seen = [t['id'] for t in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [t['id'] for t in response.data['results']]
+        self.assertEqual(seen, [task.id for task in reversed(tasks)])
+
+    def test_sparse_fieldset(self):
+        self.create_tasks(1)
+        response = self.client.get('/api/tasks/', {'fields': 'id,title'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+
+class BulkTaskTests(OrganizationAPITestCase):
+
+    def test_bulk_create_and_move(self):
+        done = Column.objects.create(name='Done', board=self.board, order=1)
+        label = Label.objects.create(name='bug', color='red')
+
+        def payload(count):
+            return [
+                {'title': f'Imported {i}', 'column': self.column.id, 'assignees': [self.user.id], 'labels': [label.id]}
+                for i in range(count)
+            ]
+
+        self.client.post('/api/tasks/bulk/', payload(1), format='json')
+        with CaptureQueriesContext(connection) as context:
+            self.client.post('/api/tasks/bulk/', payload(2), format='json')
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.post('/api/tasks/bulk/', {'tasks': payload(20)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]['assignees'], [self.user.id])
+        self.assertEqual(response.data[0]['labels'], [label.id])
+        self.assertEqual(Task.objects.filter(organization=self.organization).count(), 23)
+
+        moves = [{'id': task['id'], 'column': done.id, 'assignees': []} for task in response.data]
+        response = self.client.post('/api/tasks/bulk/', moves, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.filter(column=done).count(), 20)
+        self.assertEqual(Task.assignees.through.objects.count(), 3)
+
+    def test_rejects_foreign_column(self):
+        other = Organization.objects.create(name='Other')
+        project = Project.objects.create(name='P', organization=other)
+        board = Board.objects.create(name='B', project=project, organization=other)
+        column = Column.objects.create(name='C', board=board)
+        response = self.client.post('/api/tasks/bulk/', [{'title': 'x', 'column': column.id}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('column', response.data[0])
+        self.assertFalse(Task.objects.exists())
+
+    def test_rejects_repeated_task(self):
+        task = self.create_tasks(1)[0]
+        item = {'id': task.id, 'assignees': [self.user.id]}
+        response = self.client.post('/api/tasks/bulk/', [item, item], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('id', response.data[1])
+
+
+class ThreadedCommentTests(OrganizationAPITestCase):
+
+    def test_threaded_comments_load_in_one_query(self):
+        task = self.create_tasks(1)[0]
+        root = Comment.objects.create(task=task, user=self.user, content='root')
+        parent = root
+        for i in range(5):
+            parent = Comment.objects.create(task=task, user=self.user, content=f'reply {i}', parent=parent)
+        Comment.objects.create(task=task, user=self.user, content='second root')
+
+        url = f'/api/comments/?task={task.id}&threaded=1'
+        self.count_queries(url)
+        baseline = self.count_queries(url)
+        Comment.objects.create(task=task, user=self.user, content='late reply', parent=parent)
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url)
+
+        self.assertEqual([c['content'] for c in response.data], ['root', 'second root'])
+        node = response.data[0]
+        for i in range(5):
+            node = node['replies'][0]
+            self.assertEqual(node['content'], f'reply {i}')
+        self.assertEqual(node['replies'][0]['content'], 'late reply')
+
+        response = self.client.get(url + '&depth=1')
+        self.assertEqual(len(response.data[0]['replies']), 1)
+        self.assertEqual(response.data[0]['replies'][0]['replies'], [])
+
+
+class MembershipCacheTests(OrganizationAPITestCase):
+
+    def change_elsewhere(self, change):
+        # As if another worker saved it: the shared version moves on, this process's caches are left alone.
+        with mock.patch('core.signals.membership_cache'), mock.patch('core.signals.organization_cache'):
+            change()
+
+    def test_revoked_member_is_denied_on_the_next_request(self):
+        self.assertEqual(self.client.get(f'/api/boards/{self.board.id}/').status_code, 200)
+        self.assertEqual(self.client.get('/api/sync/').status_code, 200)
+        self.change_elsewhere(Membership.objects.get(user=self.user).delete)
+        self.assertEqual(self.client.get(f'/api/boards/{self.board.id}/').status_code, 403)
+        self.assertEqual(self.client.get('/api/sync/').status_code, 403)
+
+    def test_downgraded_role_applies_to_the_next_lookup(self):
+        self.assertEqual(get_role(self.user, self.organization), 'admin')
+        self.assertEqual(get_membership(self.user.id, self.organization.id).role, 'admin')
+        membership = Membership.objects.get(user=self.user)
+        membership.role = 'member'
+        self.change_elsewhere(membership.save)
+        self.assertEqual(get_role(self.user, self.organization), 'member')
+        self.assertEqual(get_membership(self.user.id, self.organization.id).role, 'member')
+
+    def test_organization_changes_apply_to_the_next_lookup(self):
+        self.assertEqual(get_organization(self.organization.id).name, 'Acme')
+        self.organization.name = 'Acme Inc'
+        self.change_elsewhere(self.organization.save)
+        self.assertEqual(get_organization(self.organization.id).name, 'Acme Inc')
+        self.assertEqual(async_to_sync(aget_organization)(self.organization.id).name, 'Acme Inc')
+
+
+class ActivityLogBufferTests(OrganizationAPITestCase):
+
+    def test_activity_is_written_in_batches_after_commit(self):
+        task = self.create_tasks(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                response = self.client.post(f'/api/tasks/{task.id}/assign_member/', {'user_id': self.user.id})
+                self.assertEqual(response.status_code, 200)
+            self.assertFalse(ActivityLog.objects.exists())
+
+        self.assertEqual(flush_activity_log(), 3)
+        log = ActivityLog.objects.first()
+        self.assertEqual((log.project_id, log.task_id, log.action), (self.project.id, task.id, 'assigned'))
+
+
+class ActivityLogFlushTests(APITransactionTestCase):
+    """Flushes commit for real here, so foreign keys are checked."""
+
+    def setUp(self):
+        organization = Organization.objects.create(name='Acme')
+        project = Project.objects.create(name='Platform', organization=organization)
+        board = Board.objects.create(name='Sprint', project=project, organization=organization)
+        column = Column.objects.create(name='To do', board=board)
+        self.tasks = [Task.objects.create(title=f'Task {i}', column=column) for i in range(2)]
+
+    def tearDown(self):
+        flush_activity_log()
+
+    def test_entries_of_deleted_tasks_do_not_discard_the_batch(self):
+        log_activity(None, self.tasks[0], 'updated', 'kept')
+        log_activity(None, self.tasks[1], 'updated', 'stale')
+        self.tasks[1].delete()
+        with self.assertLogs('core.activity', 'WARNING'):
+            self.assertEqual(flush_activity_log(), 1)
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['kept'])
+
+    def test_failed_flushes_stay_off_the_request_and_keep_the_rows(self):
+        failure = OperationalError('disk I/O error')
+        with override_settings(ACTIVITY_LOG={'MAX_BATCH': 1}), \
+                mock.patch.object(activity_log_buffer, 'flush', side_effect=failure) as flush, \
+                self.assertLogs('core.activity', 'ERROR'):
+            log_activity(None, self.tasks[0], 'updated', 'first')
+            activity_log_buffer._timer.join()
+        flush.assert_called_once()
+
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', side_effect=failure):
+            with self.assertRaises(OperationalError):
+                flush_activity_log()
+        self.assertEqual(flush_activity_log(), 1)
+        self.assertEqual(ActivityLog.objects.get().description, 'first')
+
+
+class QueryPlanTests(OrganizationAPITestCase):
+
+    def test_endpoint_queries_use_indexes(self):
+        self.create_tasks(3)
+        call_command('explain_queries', '--fail-on-scan', stdout=StringIO())
+
+
+class DenormalizedScopeTests(OrganizationAPITestCase):
+
+    def test_task_scope_follows_column_moves(self):
+        response = self.client.post('/api/tasks/', {'title': 'New', 'column': self.column.id, 'assignees': []}, format='json')
+        self.assertEqual(response.status_code, 201)
+        task = Task.objects.get(pk=response.data['id'])
+        self.assertEqual((task.organization_id, task.project_id), (self.organization.id, self.project.id))
+
+        other_project = Project.objects.create(name='Ops', organization=self.organization)
+        other_board = Board.objects.create(name='Ops', project=other_project, organization=self.organization)
+        self.column.board = other_board
+        self.column.save()
+        task.refresh_from_db()
+        self.assertEqual(task.project_id, other_project.id)
+
+        self.board.project = other_project
+        self.board.save()
+        other_column = Column.objects.create(name='Doing', board=self.board)
+        self.assertEqual(other_column.project_id, other_project.id)
+
+    def test_labels_belong_to_the_active_organization(self):
+        other = Label.objects.create(name='bug', color='red', organization=Organization.objects.create(name='Other'))
+        response = self.client.post('/api/labels/', {'name': 'bug', 'color': 'blue'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Label.objects.get(pk=response.data['id']).organization_id, self.organization.id)
+        self.assertEqual([label['id'] for label in self.client.get('/api/labels/').data['results']], [response.data['id']])
+        self.assertEqual(self.client.get(f'/api/labels/{other.id}/').status_code, 404)
+
+
+class BoardRealtimeTests(OrganizationAPITestCase):
+
+    def test_task_changes_are_published_to_the_board_group(self):
+        task = self.create_tasks(1)[0]
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(board_group_name(self.board.id), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/tasks/{task.id}/', {'title': 'Renamed'}, format='json')
+            self.client.delete(f'/api/tasks/{task.id}/')
+
+        updated = async_to_sync(layer.receive)(channel)
+        deleted = async_to_sync(layer.receive)(channel)
+        self.assertEqual(updated['events'][0]['data']['title'], 'Renamed')
+        self.assertEqual(deleted['events'], [board_event('task', 'deleted', task.id)])
+
+    def test_bulk_and_assignment_events_carry_their_action(self):
+        task = Task.objects.create(title='Existing', column=self.column)
+        other = Board.objects.create(name='Next', project=self.project, organization=self.organization)
+        other_column = Column.objects.create(name='Backlog', board=other)
+        layer = get_channel_layer()
+        channels = {}
+        for board in (self.board, other):
+            channels[board.id] = async_to_sync(layer.new_channel)()
+            async_to_sync(layer.group_add)(board_group_name(board.id), channels[board.id])
+
+        def events(board):
+            return [(event['action'], event['id']) for event in async_to_sync(layer.receive)(channels[board.id])['events']]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tasks/bulk/', [
+                {'title': 'New', 'column': self.column.id}, {'id': task.id, 'column': other_column.id},
+            ], format='json')
+        created = response.data[0]['id']
+        self.assertEqual(events(self.board), [('created', created), ('deleted', task.id)])
+        self.assertEqual(events(other), [('updated', task.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/tasks/{task.id}/assign_member/', {'user_id': self.user.id})
+        # Write the queued activity entry here rather than from the timer thread.
+        flush_activity_log()
+        event = async_to_sync(layer.receive)(channels[other.id])['events'][0]
+        self.assertEqual((event['action'], event['id'], event['data']['assignees']), ('updated', task.id, [self.user.id]))
+
+    @mock.patch.object(BoardConsumer, 'can_view_board', mock.AsyncMock(return_value=True))
+    def test_consumer_coalesces_bursts_into_one_frame(self):
+        async def scenario():
+            # channels.testing needs daphne, so speak the websocket ASGI protocol directly.
+            scope = {'type': 'websocket', 'path': f'/ws/boards/{self.board.id}/', 'user': self.user, 'headers': [], 'query_string': b''}
+            communicator = ApplicationCommunicator(URLRouter(websocket_urlpatterns), scope)
+            await communicator.send_input({'type': 'websocket.connect'})
+            self.assertEqual((await communicator.receive_output())['type'], 'websocket.accept')
+
+            layer = get_channel_layer()
+            group = board_group_name(self.board.id)
+            await layer.group_send(group, {'type': 'board.events', 'events': [board_event('task', 'created', 1, {'title': 'a'})]})
+            await layer.group_send(group, {'type': 'board.events', 'events': [board_event('task', 'updated', 1, {'title': 'b'})]})
+            await layer.group_send(group, {'type': 'board.events', 'events': [board_event('column', 'updated', 2)]})
+
+            frame = json.loads((await communicator.receive_output())['text'])
+            self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        self.assertEqual(frame['events'], [
+            board_event('task', 'created', 1, {'title': 'b'}),
+            board_event('column', 'updated', 2),
+        ])
+
+
+class BoardSnapshotTests(OrganizationAPITestCase):
+
+    def test_snapshot_query_count_is_constant(self):
+        done = Column.objects.create(name='Done', board=self.board, order=1)
+        self.create_tasks(2)
+        url = f'/api/boards/{self.board.id}/snapshot/'
+        self.count_queries(url)
+        baseline = self.count_queries(url)
+
+        self.create_tasks(10)
+        Task.objects.create(title='Shipped', column=done)
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url)
+        self.assertEqual([c['name'] for c in response.data['columns']], ['To do', 'Done'])
+        self.assertEqual(len(response.data['columns'][0]['tasks']), 12)
+        self.assertEqual(response.data['columns'][1]['tasks'][0]['title'], 'Shipped')
+
+    def test_snapshot_since_returns_changed_tasks_only(self):
+        tasks = self.create_tasks(3)
+        since = self.client.get(f'/api/boards/{self.board.id}/snapshot/').data['server_time']
+        tasks[1].title = 'Changed'
+        tasks[1].save()
+
+        response = self.client.get(f'/api/boards/{self.board.id}/snapshot/', {'since': since.isoformat()})
+        self.assertEqual([t['title'] for t in response.data['columns'][0]['tasks']], ['Changed'])
+        self.assertEqual(sorted(response.data['task_ids']), [task.id for task in tasks])
+
+        tasks[0].delete()
+        other = Board.objects.create(name='Other', project=self.project, organization=self.organization)
+        tasks[2].column = Column.objects.create(name='Elsewhere', board=other)
+        tasks[2].save()
+        response = self.client.get(f'/api/boards/{self.board.id}/snapshot/', {'since': since.isoformat()})
+        self.assertEqual(response.data['task_ids'], [tasks[1].id])
+        self.assertNotIn('task_ids', self.client.get(f'/api/boards/{self.board.id}/snapshot/').data)
+
+    def test_snapshot_with_sparse_fieldset(self):
+        self.create_tasks(2)
+        response = self.client.get(f'/api/boards/{self.board.id}/snapshot/', {'fields': 'id,title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([set(task) for task in response.data['columns'][0]['tasks']], [{'id', 'title'}] * 2)
+
+    def test_columns_filter_by_board(self):
+        other = Board.objects.create(name='Other', project=self.project, organization=self.organization)
+        Column.objects.create(name='Elsewhere', board=other)
+        response = self.client.get('/api/columns/', {'board': self.board.id})
+        self.assertEqual([c['name'] for c in response.data['results']], ['To do'])
+
+
+class OrderingTests(OrganizationAPITestCase):
+
+    def create_columns(self, names):
+        return [self.client.post('/api/columns/', {'name': name, 'board': self.board.id}).data['id'] for name in names]
+
+    def column_names(self):
+        return list(Column.objects.filter(board=self.board).order_by('order', 'id').values_list('name', flat=True))
+
+    def test_move_writes_only_the_moved_column(self):
+        ids = self.create_columns(['A', 'B', 'C'])
+        before = dict(Column.objects.values_list('id', 'order'))
+        response = self.client.post(f'/api/columns/{ids[2]}/move/', {'after': self.column.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        after = dict(Column.objects.values_list('id', 'order'))
+        self.assertEqual([pk for pk in after if after[pk] != before[pk]], [ids[2]])
+        self.assertEqual(self.column_names(), ['To do', 'C', 'A', 'B'])
+
+        self.client.post(f'/api/columns/{ids[1]}/move/', {'after': None}, format='json')
+        self.assertEqual(self.column_names(), ['B', 'To do', 'C', 'A'])
+
+    def test_move_rebalances_when_neighbours_touch(self):
+        a, b, c = self.create_columns(['A', 'B', 'C'])
+        Column.objects.filter(pk__in=[a, b]).update(order=5)
+        Column.objects.filter(pk=c).update(order=6)
+        self.client.post(f'/api/columns/{self.column.id}/move/', {'after': a}, format='json')
+        self.assertEqual(self.column_names(), ['A', 'To do', 'B', 'C'])
+        orders = list(Column.objects.filter(board=self.board).order_by('order').values_list('order', flat=True))
+        self.assertEqual(len(set(orders)), 4)
+
+    def test_ranks_are_respaced_before_leaving_their_bounds(self):
+        a, b = self.create_columns(['A', 'B'])
+        Column.objects.filter(pk=self.column.id).update(order=-ordering.RANK_LIMIT)
+        self.client.post(f'/api/columns/{b}/move/', {'after': None}, format='json')
+        self.assertEqual(self.column_names(), ['B', 'To do', 'A'])
+        orders = list(Column.objects.filter(board=self.board).order_by('order').values_list('order', flat=True))
+        self.assertTrue(all(abs(order) <= 3 * ordering.RANK_GAP for order in orders), orders)
+
+        tasks = self.create_tasks(2)
+        Task.objects.filter(pk=tasks[1].pk).update(position=ordering.RANK_LIMIT)
+        created = self.client.post('/api/tasks/', {'title': 'Last', 'column': self.column.id}).data['id']
+        Task.objects.filter(pk=created).update(position=ordering.RANK_LIMIT)
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': 'Bulk', 'column': self.column.id}, {'id': tasks[0].id, 'title': 'Renamed'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        positions = list(Task.objects.filter(column=self.column).order_by('position').values_list('title', 'position'))
+        self.assertEqual([title for title, _ in positions], ['Renamed', 'Task 1', 'Last', 'Bulk'])
+        self.assertTrue(all(position <= 4 * ordering.RANK_GAP for _, position in positions), positions)
+
+    def test_move_rejects_column_of_other_board(self):
+        other = Board.objects.create(name='Other', project=self.project, organization=self.organization)
+        elsewhere = Column.objects.create(name='Elsewhere', board=other)
+        response = self.client.post(f'/api/columns/{self.column.id}/move/', {'after': elsewhere.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reorder_sets_whole_board(self):
+        a, b = self.create_columns(['A', 'B'])
+        response = self.client.post(
+            '/api/columns/reorder/', {'board': self.board.id, 'columns': [b, self.column.id, a]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column_names(), ['B', 'To do', 'A'])
+        response = self.client.post('/api/columns/reorder/', {'board': self.board.id, 'columns': [a, b]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_move_between_columns(self):
+        done = Column.objects.create(name='Done', board=self.board, order=1)
+        first = self.client.post('/api/tasks/', {'title': 'First', 'column': self.column.id}).data
+        second = self.client.post('/api/tasks/', {'title': 'Second', 'column': self.column.id}).data
+        self.assertLess(first['position'], second['position'])
+        shipped = Task.objects.create(title='Shipped', column=done)
+
+        response = self.client.post(f'/api/tasks/{second["id"]}/move/', {'column': done.id, 'after': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['column'], done.id)
+        snapshot = self.client.get(f'/api/boards/{self.board.id}/snapshot/').data
+        self.assertEqual([t['title'] for t in snapshot['columns'][1]['tasks']], ['Second', 'Shipped'])
+        self.assertEqual(Task.objects.get(pk=shipped.pk).position, 0)
+
+    def test_bulk_created_tasks_are_appended(self):
+        self.client.post('/api/tasks/', {'title': 'Existing', 'column': self.column.id})
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': 'One', 'column': self.column.id}, {'title': 'Two', 'column': self.column.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        titles = Task.objects.filter(column=self.column).order_by('position').values_list('title', flat=True)
+        self.assertEqual(list(titles), ['Existing', 'One', 'Two'])
+
+    def test_column_edits_keep_ranks_gapped(self):
+        a, b = self.create_columns(['A', 'B'])
+        response = self.client.patch(f'/api/columns/{b}/', {'order': -1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column_names(), ['B', 'To do', 'A'])
+        self.client.post('/api/columns/', {'name': 'C', 'board': self.board.id, 'order': response.data['order']})
+        self.assertEqual(self.column_names(), ['B', 'C', 'To do', 'A'])
+        orders = list(Column.objects.filter(board=self.board).order_by('order').values_list('order', flat=True))
+        self.assertTrue(all(later - earlier > 1 for earlier, later in zip(orders, orders[1:])), orders)
+
+        other = Board.objects.create(name='Other', project=self.project, organization=self.organization)
+        existing = Column.objects.create(name='Existing', board=other, order=ordering.RANK_GAP)
+        self.client.patch(f'/api/columns/{a}/', {'board': other.id}, format='json')
+        self.assertGreater(Column.objects.get(pk=a).order, existing.order)
+
+    def test_tasks_moved_by_edits_join_the_end_of_their_column(self):
+        done = Column.objects.create(name='Done', board=self.board, order=1)
+        shipped = self.client.post('/api/tasks/', {'title': 'Shipped', 'column': done.id}).data
+        first, second = (self.client.post('/api/tasks/', {'title': t, 'column': self.column.id}).data for t in 'AB')
+        self.client.patch(f'/api/tasks/{first["id"]}/', {'column': done.id}, format='json')
+        self.client.post('/api/tasks/bulk/', [{'id': second['id'], 'column': done.id}], format='json')
+        positions = list(Task.objects.filter(column=done).order_by('position').values_list('title', 'position'))
+        self.assertEqual([title for title, _ in positions], ['Shipped', 'A', 'B'])
+        self.assertEqual(len({position for _, position in positions}), 3)
+
+
+@mock.patch('core.sync.SETTLE_WINDOW', timedelta(0))
+class SyncTests(OrganizationAPITestCase):
+
+    def test_token_returns_only_changes_and_deletions(self):
+        tasks = self.create_tasks(5)
+        response = self.client.get('/api/sync/')
+        self.assertEqual(len(response.data['tasks']), 5)
+        self.assertEqual([c['id'] for c in response.data['columns']], [self.column.id])
+        self.assertEqual(response.data['deleted'], [])
+        token = response.data['token']
+
+        tasks[0].title = 'Changed'
+        tasks[0].save()
+        tasks[1].assignees.clear()
+        comment = Comment.objects.create(task=tasks[2], user=self.user, content='hi')
+        deleted_id = tasks[3].id
+        tasks[3].delete()
+
+        response = self.client.get('/api/sync/', {'token': token})
+        self.assertEqual([t['id'] for t in response.data['tasks']], [tasks[0].id, tasks[1].id])
+        self.assertEqual(response.data['columns'], [])
+        self.assertEqual([c['id'] for c in response.data['comments']], [comment.id])
+        self.assertEqual([(d['kind'], d['id']) for d in response.data['deleted']], [('task', deleted_id)])
+
+        response = self.client.get('/api/sync/', {'token': response.data['token']})
+        self.assertEqual((response.data['tasks'], response.data['deleted']), ([], []))
+
+    def test_cascades_write_their_tombstones_in_one_insert(self):
+        tasks = self.create_tasks(4)
+        comments = [Comment.objects.create(task=task, user=self.user, content='hi') for task in tasks]
+        with CaptureQueriesContext(connection) as context:
+            self.board.delete()
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "core_tombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list('kind', 'object_id')),
+            sorted([('column', self.column.id), *[('task', t.id) for t in tasks], *[('comment', c.id) for c in comments]]),
+        )
+
+        task = Task.objects.create(title='Alone', column=Column.objects.create(name='Done', board=Board.objects.create(
+            name='Next', project=self.project, organization=self.organization)))
+        task_id = task.id
+        task.delete()
+        self.assertTrue(Tombstone.objects.filter(kind='task', object_id=task_id).exists())
+
+    def test_pages_until_caught_up(self):
+        tasks = self.create_tasks(5)
+        seen, token, has_more = [], None, True
+        while has_more:
+            response = self.client.get('/api/sync/', {'token': token, 'limit': 2} if token else {'limit': 2})
+            seen += [t['id'] for t in response.data['tasks']]
+            token, has_more = response.data['token'], response.data['has_more']
+        self.assertEqual(seen, [task.id for task in tasks])
+
+    def test_rejects_foreign_and_expired_tokens(self):
+        token = self.client.get('/api/sync/').data['token']
+        other = Organization.objects.create(name='Other')
+        Membership.objects.create(user=self.user, organization=other, role='member')
+        self.client.post(f'/api/organizations/{other.id}/switch/')
+        self.assertEqual(self.client.get('/api/sync/', {'token': token}).status_code, 400)
+
+        with mock.patch('core.sync.TOMBSTONE_RETENTION', timedelta(0)):
+            token = self.client.get('/api/sync/').data['token']
+            self.assertEqual(self.client.get('/api/sync/', {'token': token}).status_code, 410)
+
+
+class ExportTests(OrganizationAPITestCase):
+
+    def test_task_export_streams_csv_and_ndjson(self):
+        tasks = self.create_tasks(3)
+        response = self.client.get('/api/tasks/export/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'title'])
+        self.assertEqual(len(lines), 4)
+
+        response = self.client.get('/api/tasks/export/', {'file_format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in tasks])
+        self.assertEqual(rows[0]['assignees'], [self.user.id])
+        self.assertEqual(len(rows[0]['labels']), 2)
+
+        self.assertEqual(self.client.get('/api/tasks/export/', {'file_format': 'xml'}).status_code, 400)
+
+    def test_activity_export_is_scoped_to_the_organization(self):
+        task = self.create_tasks(1)[0]
+        other = Project.objects.create(name='Elsewhere', organization=Organization.objects.create(name='Other'))
+        ActivityLog.objects.create(user=self.user, task=task, project=self.project, action='created', description='mine')
+        ActivityLog.objects.create(user=self.user, project=other, action='created', description='theirs')
+
+        response = self.client.get('/api/activity-logs/export/', {'file_format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['description'], row['username']) for row in rows], [('mine', 'owner')])
+
+        # Demoted through another worker: only the shared role version tells this one.
+        membership = Membership.objects.get(user=self.user)
+        membership.role = 'manager'
+        with mock.patch('core.signals.membership_cache'):
+            membership.save()
+        self.assertEqual(self.client.get('/api/activity-logs/export/').status_code, 200)
+        membership.role = 'member'
+        with mock.patch('core.signals.membership_cache'):
+            membership.save()
+        self.assertEqual(self.client.get('/api/activity-logs/export/').status_code, 403)
+
+    def test_csv_cells_are_not_read_as_formulas(self):
+        task = Task.objects.create(title='=HYPERLINK("http://example.com")', description='-1+2', column=self.column)
+        response = self.client.get('/api/tasks/export/')
+        row = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))[0]
+        self.assertEqual(row['id'], str(task.id))
+        self.assertEqual(row['title'], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row['description'], "'-1+2")
+
+
+class SearchTests(OrganizationAPITestCase):
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(hit['kind'], hit['id']) for hit in response.data['results']]
+
+    def test_ranked_org_scoped_results_follow_writes(self):
+        in_title = Task.objects.create(title='Fix login redirect', column=self.column)
+        in_body = Task.objects.create(title='Cleanup', description='the login page flickers', column=self.column)
+        comment = Comment.objects.create(task=in_body, user=self.user, content='Login works for me')
+        other = Organization.objects.create(name='Other')
+        project = Project.objects.create(name='P', organization=other)
+        column = Column.objects.create(name='C', board=Board.objects.create(name='B', project=project, organization=other))
+        Task.objects.create(title='login elsewhere', column=column)
+
+        hits = self.search('logi')
+        self.assertEqual(hits[0], ('task', in_title.id))
+        self.assertEqual(set(hits), {('task', in_title.id), ('task', in_body.id), ('comment', comment.id)})
+        self.assertEqual(len(self.search('login', limit=2)), 2)
+
+        self.client.post('/api/tasks/bulk/', [{'id': in_title.id, 'title': 'Fix signup redirect'}], format='json')
+        comment.delete()
+        self.assertEqual(self.search('login'), [('task', in_body.id)])
+        self.assertEqual(self.search('signup'), [('task', in_title.id)])
+
+    def test_rebuild_command(self):
+        task = self.create_tasks(1)[0]
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM core_search_index')
+        self.assertEqual(self.search('Task'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('Task'), [('task', task.id)])
+
+    def test_backend_is_chosen_again_after_migrate(self):
+        self.assertRaises(TypeError, SearchBackend)
+        get_search_backend.cache_clear()
+        self.addCleanup(get_search_backend.cache_clear)
+        with mock.patch('core.search.fts_table_exists', return_value=False):
+            self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+        self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+        emit_post_migrate_signal(0, False, 'default')
+        self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+
+
+class TaskFilterTests(OrganizationAPITestCase):
+
+    def ids(self, **params):
+        response = self.client.get('/api/tasks/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {task['id'] for task in response.data['results']}
+
+    def test_filters(self):
+        today = date.today()
+        mine = Task.objects.create(title='Mine', column=self.column, due_date=today + timedelta(days=2), priority='high')
+        mine.assignees.add(self.user)
+        late = Task.objects.create(title='Late', column=self.column, due_date=today - timedelta(days=1))
+        done = Task.objects.create(title='Done', column=self.column, due_date=today - timedelta(days=1), completed_at=now())
+        label = Label.objects.create(name='bug', color='red')
+        late.labels.add(label)
+        other_board = Board.objects.create(name='Other', project=self.project, organization=self.organization)
+        elsewhere = Task.objects.create(title='Elsewhere', column=Column.objects.create(name='C', board=other_board))
+
+        week = {'due_after': today.isoformat(), 'due_before': (today + timedelta(days=7)).isoformat()}
+        self.assertEqual(self.ids(assignee='me', **week), {mine.id})
+        self.assertEqual(self.ids(overdue='true'), {late.id})
+        self.assertEqual(self.ids(completed='true'), {done.id})
+        self.assertEqual(self.ids(label=str(label.id)), {late.id})
+        self.assertEqual(self.ids(priority='high,low'), {mine.id})
+        self.assertEqual(self.ids(board=other_board.id), {elsewhere.id})
+        self.assertEqual(self.ids(column=f'{self.column.id}', overdue='false'), {mine.id, done.id})
+
+    def test_rejects_unbounded_or_invalid_filters(self):
+        today = date.today()
+        for params in (
+            {'due_after': today.isoformat()},
+            {'due_after': today.isoformat(), 'due_before': (today + timedelta(days=400)).isoformat()},
+            {'due_after': today.isoformat(), 'due_before': (today - timedelta(days=1)).isoformat()},
+            {'priority': 'urgent'},
+            {'label': ','.join(str(i) for i in range(1, 30))},
+            {'assignee': 'someone'},
+        ):
+            self.assertEqual(self.client.get('/api/tasks/', params).status_code, 400, params)
+
+
+@override_settings(INSTRUMENTATION={
+    'ENABLED': True, 'SERVER_TIMING': True, 'ENFORCE_BUDGETS': True, 'METRICS_TOKEN': 'scrape-token',
+})
+class InstrumentationTests(OrganizationAPITestCase):
+
+    def get_cold(self, url):
+        return self.request_cold('get', url)
+
+    def request_cold(self, method, url, data=None):
+        # Budgets hold with every cache empty, the worst case after a deploy.
+        cache.clear()
+        organization_cache.clear()
+        membership_cache.clear()
+        response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300, (method, url, getattr(response, 'data', None)))
+        return response
+
+    def test_every_endpoint_declares_and_meets_a_query_budget(self):
+        for _, viewset, _ in router.registry:
+            self.assertIsNotNone(getattr(viewset, 'query_budget', None), viewset)
+        for pattern in core_urlpatterns:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                self.assertIsNotNone(getattr(view_class, 'query_budget', None), view_class)
+
+        tasks = self.create_tasks(5)
+        for task in tasks:
+            comment = Comment.objects.create(task=task, user=self.user, content='looks good')
+            Comment.objects.create(task=task, user=self.user, content='thanks', parent=comment)
+            ActivityLog.objects.create(user=self.user, task=task, project=self.project, action='created', description='x')
+        org, task, comment = self.organization.id, tasks[0].id, Comment.objects.first().id
+        log = ActivityLog.objects.first().id
+        label = Label.objects.create(name='bug', color='red', organization=self.organization).id
+
+        for url in (
+            '/api/organizations/', f'/api/organizations/{org}/', '/api/organizations/my-organizations/',
+            '/api/projects/', f'/api/projects/{self.project.id}/',
+            '/api/boards/', f'/api/boards/{self.board.id}/', f'/api/boards/{self.board.id}/snapshot/',
+            '/api/columns/', f'/api/columns/{self.column.id}/',
+            '/api/tasks/', f'/api/tasks/{task}/', '/api/tasks/export/',
+            '/api/labels/', f'/api/labels/{label}/',
+            f'/api/comments/?task={task}', f'/api/comments/{comment}/?task={task}',
+            '/api/activity-logs/', f'/api/activity-logs/{log}/', '/api/activity-logs/export/',
+            '/api/sync/', '/api/search/?q=task',
+            f'/api/analytics/tasks-completed/?org_id={org}', f'/api/analytics/member-productivity/?org_id={org}',
+            f'/api/analytics/missed-deadlines/?org_id={org}',
+            f'/api/analytics/burndown-chart/?org_id={org}&project_id={self.project.id}',
+        ):
+            self.get_cold(url)
+
+    def test_write_actions_declare_and_meet_a_query_budget(self):
+        writes = ('create', 'update', 'partial_update', 'destroy')
+        for _, viewset, _ in router.registry:
+            budget = viewset.query_budget
+            for name in (*writes, *[a.__name__ for a in viewset.get_extra_actions() if a.mapping.keys() - {'get'}]):
+                if hasattr(viewset, name):
+                    self.assertIn(name, budget, viewset)
+
+        other = CustomUser.objects.create_user('other')
+        write = self.request_cold
+
+        def populate(column):
+            for i in range(3):
+                task = Task.objects.create(title=f'Task {i}', column=column)
+                task.assignees.add(self.user)
+                comment = Comment.objects.create(task=task, user=self.user, content='looks good')
+                Comment.objects.create(task=task, user=self.user, content='thanks', parent=comment)
+
+        org = write('post', '/api/organizations/', {'name': 'Other'}).data['id']
+        write('post', f'/api/organizations/{self.organization.id}/switch/')
+        write('put', f'/api/organizations/{self.organization.id}/', {'name': 'Acme'})
+        write('patch', f'/api/organizations/{self.organization.id}/', {'name': 'Acme Inc'})
+        self.client.force_authenticate(other)
+        write('post', f'/api/organizations/{self.organization.id}/join/')
+        self.client.force_authenticate(self.user)
+
+        project = write('post', '/api/projects/', {'name': 'Ops', 'organization': self.organization.id}).data['id']
+        write('put', f'/api/projects/{project}/', {'name': 'Ops', 'organization': self.organization.id})
+        write('patch', f'/api/projects/{project}/', {'name': 'Operations'})
+        board = write('post', '/api/boards/', {'name': 'Next', 'project': project}).data['id']
+        write('put', f'/api/boards/{board}/', {'name': 'Next', 'project': project})
+        write('patch', f'/api/boards/{board}/', {'name': 'Later'})
+        column = write('post', '/api/columns/', {'name': 'Doing', 'board': self.board.id}).data['id']
+        write('put', f'/api/columns/{column}/', {'name': 'Doing', 'board': self.board.id})
+        write('patch', f'/api/columns/{column}/', {'name': 'In progress', 'order': -1})
+
+        task = write('post', '/api/tasks/', {'title': 'New', 'column': column, 'assignees': [self.user.id]}).data['id']
+        write('put', f'/api/tasks/{task}/', {'title': 'New', 'column': self.column.id, 'assignees': [other.id]})
+        write('patch', f'/api/tasks/{task}/', {'title': 'Renamed', 'column': column})
+        write('post', f'/api/tasks/{task}/assign_member/', {'user_id': self.user.id})
+        label = write('post', '/api/labels/', {'name': 'bug', 'color': 'red'}).data['id']
+        write('post', '/api/tasks/bulk/', [
+            {'id': task, 'column': column, 'assignees': [], 'labels': [label]},
+            {'title': 'Imported', 'column': self.column.id, 'assignees': [self.user.id], 'labels': [label]},
+        ])
+        write('put', f'/api/labels/{label}/', {'name': 'bug', 'color': 'orange'})
+        write('patch', f'/api/labels/{label}/', {'color': 'yellow'})
+        write('delete', f'/api/labels/{label}/')
+        comment = write('post', '/api/comments/', {'task': task, 'content': 'hi'}).data['id']
+        write('put', f'/api/comments/{comment}/?task={task}', {'task': task, 'content': 'hello'})
+        write('patch', f'/api/comments/{comment}/?task={task}', {'content': 'hey'})
+        write('delete', f'/api/comments/{comment}/?task={task}')
+        write('delete', f'/api/tasks/{task}/')
+
+        # Cascades cost the same however many objects they remove.
+        populate(Column.objects.get(pk=column))
+        write('delete', f'/api/columns/{column}/')
+        populate(self.column)
+        write('delete', f'/api/boards/{self.board.id}/')
+        populate(Column.objects.create(name='To do', board_id=board))
+        write('delete', f'/api/projects/{project}/')
+        other_project = Project.objects.create(name='Other', organization_id=org)
+        populate(Column.objects.create(name='To do', board=Board.objects.create(
+            name='Other', project=other_project, organization_id=org)))
+        write('delete', f'/api/organizations/{org}/')
+        flush_activity_log()
+
+    def test_overrun_fails_and_metrics_are_exported(self):
+        self.create_tasks(2)
+        response = self.get_cold('/api/tasks/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        from .views import TaskViewSet
+        with mock.patch.object(TaskViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/tasks/')
+
+        registry.reset()
+        self.client.get('/api/tasks/')
+        metrics = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        self.assertIn('http_requests_total{view="task-list",method="GET",status="200"} 1', metrics)
+        self.assertIn('db_queries_total{view="task-list"}', metrics)
+
+    def test_metrics_need_the_token_or_a_staff_user(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+
+class ReplicaRoutingTests(OrganizationAPITestCase):
+
+    def test_router_follows_read_alias(self):
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        with reading_from(REPLICA_ALIAS):
+            self.assertEqual(router.db_for_read(Task), REPLICA_ALIAS)
+            self.assertEqual(router.db_for_write(Task), 'default')
+        self.assertFalse(router.allow_migrate(REPLICA_ALIAS, 'core'))
+
+    @mock.patch('core.replicas.replica_configured', return_value=True)
+    @mock.patch('core.replicas.connections', {'default': mock.Mock(in_atomic_block=False)})
+    def test_reads_use_replica_unless_pinned(self, configured):
+        factory = RequestFactory()
+        self.assertEqual(read_alias(factory.get('/api/activity-logs/')), REPLICA_ALIAS)
+        self.assertEqual(read_alias(factory.post('/api/activity-logs/')), 'default')
+        pinned = factory.get('/api/activity-logs/', HTTP_COOKIE=f'{PIN_COOKIE}=1')
+        self.assertEqual(read_alias(pinned), 'default')
+
+    @mock.patch('core.replicas.replica_configured', return_value=True)
+    def test_writes_pin_client_to_primary(self, configured):
+        response = self.client.post('/api/tasks/', {'title': 'Pinned', 'column': self.column.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertNotIn(PIN_COOKIE, self.client.get('/api/tasks/').cookies)
+
+
+@skipUnless(replica_configured(), 'Needs a replica alias, e.g. DATABASE_PROFILE=sqlite-replica.')
+class ReplicaQueryTests(APITransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('reader')
+        self.organization = Organization.objects.create(name='Replicated')
+        Membership.objects.create(user=self.user, organization=self.organization, role='admin')
+        self.project = Project.objects.create(name='Platform', organization=self.organization)
+        self.client.force_authenticate(self.user)
+        session = self.client.session
+        session['active_org'] = self.organization.id
+        session.save()
+
+    def replica_queries(self, url):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(context.captured_queries)
+
+    def test_read_only_views_read_from_replica_until_a_write(self):
+        url = f'/api/activity-logs/?project={self.project.id}'
+        self.assertGreater(self.replica_queries(url), 0)
+        self.assertEqual(self.replica_queries('/api/tasks/'), 0)
+
+        self.client.post('/api/projects/', {'name': 'New', 'organization': self.organization.id})
+        self.assertEqual(self.replica_queries(url), 0)
+
+
+class AsyncViewTests(OrganizationAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.authorization = f'Bearer {AccessToken.for_user(self.user)}'
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    def assertSameResponse(self, sync_url, async_url, ignore=()):
+        expected, actual = self.client.get(sync_url), self.client.get(async_url)
+        self.assertEqual(actual.status_code, expected.status_code)
+        expected, actual = expected.json(), actual.json()
+        for key in ignore:
+            expected.pop(key), actual.pop(key)
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_task_list_matches_sync_view(self):
+        self.create_tasks(5)
+        page = self.assertSameResponse('/api/tasks/?page_size=2', '/api/async/tasks/?page_size=2', ignore=['next'])
+        self.assertEqual(len(page['results']), 2)
+        following = self.client.get(self.client.get('/api/async/tasks/?page_size=2').json()['next']).json()
+        self.assertEqual(
+            [task['id'] for task in following['results']],
+            [task['id'] for task in self.client.get(self.client.get('/api/tasks/?page_size=2').data['next']).data['results']],
+        )
+        self.assertSameResponse('/api/tasks/?label=1&priority=high', '/api/async/tasks/?label=1&priority=high')
+        self.assertSameResponse('/api/tasks/?due_after=2024-01-01', '/api/async/tasks/?due_after=2024-01-01')
+
+    def test_snapshot_matches_sync_view(self):
+        Column.objects.create(name='Done', board=self.board, order=1)
+        self.create_tasks(3)
+        snapshot = self.assertSameResponse(
+            f'/api/boards/{self.board.id}/snapshot/', f'/api/async/boards/{self.board.id}/snapshot/', ignore=['server_time'],
+        )
+        self.assertEqual(len(snapshot['columns'][0]['tasks']), 3)
+        self.assertSameResponse(f'/api/boards/{self.board.id}/snapshot/?since=soon', f'/api/async/boards/{self.board.id}/snapshot/?since=soon')
+        for query in ('?since=2000-01-01T00:00:00Z', '?fields=id,title'):
+            self.assertSameResponse(
+                f'/api/boards/{self.board.id}/snapshot/{query}', f'/api/async/boards/{self.board.id}/snapshot/{query}',
+                ignore=['server_time'],
+            )
+        self.assertEqual(self.client.get(f'/api/async/boards/{self.board.id + 1}/snapshot/').status_code, 404)
+
+    def test_snapshot_checks_membership_before_fetching_tasks(self):
+        self.create_tasks(3)
+        outsider = CustomUser.objects.create_user('outsider')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(outsider)}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/async/boards/{self.board.id}/snapshot/')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse([query for query in context.captured_queries if '"core_task"' in query['sql']])
+
+    def test_analytics_match_sync_views_and_share_their_cache(self):
+        for task in self.create_tasks(3)[:2]:
+            task.completed_at = now()
+            task.save()
+        for name in ('tasks-completed', 'member-productivity', 'missed-deadlines', 'burndown-chart'):
+            query = f'?org_id={self.organization.id}&project_id={self.project.id}'
+            self.assertSameResponse(f'/analytics/{name}/{query}', f'/analytics/async/{name}/{query}')
+            etag = self.client.get(f'/analytics/{name}/{query}')['ETag']
+            response = self.client.get(f'/analytics/async/{name}/{query}', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+        self.assertSameResponse('/analytics/tasks-completed/', '/analytics/async/tasks-completed/')
+        self.assertSameResponse('/analytics/tasks-completed/?org_id=0', '/analytics/async/tasks-completed/?org_id=0')
+
+    def test_requires_jwt(self):
+        self.client.credentials()
+        response = self.client.get('/api/async/tasks/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer nonsense')
+        self.assertEqual(self.client.get('/api/async/tasks/').status_code, 401)
+
+    async def test_served_on_the_event_loop(self):
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get('/api/async/tasks/', headers={'Authorization': self.authorization})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+
+class FastSerializerParityTests(OrganizationAPITestCase):
+
+    def assertSameAsSerializers(self, url):
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            expected = self.client.get(url)
+        actual = self.client.get(url)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        return actual.json()
+
+    def test_task_list(self):
+        tasks = self.create_tasks(4)
+        tasks[0].assignees.clear()
+        Task.objects.filter(pk=tasks[1].pk).update(
+            description='“quoted” line', due_date=date(2024, 5, 1), completed_at=now(), priority='high',
+        )
+        page = self.assertSameAsSerializers('/api/tasks/?page_size=3')
+        self.assertEqual(len(page['results']), 3)
+        self.assertSameAsSerializers(page['next'])
+        self.assertSameAsSerializers('/api/tasks/?fields=id,labels,due_date,completed_at')
+        self.assertSameAsSerializers('/api/tasks/?priority=high')
+        with override_settings(TIME_ZONE='Asia/Kolkata'):
+            self.assertSameAsSerializers('/api/tasks/')
+
+    def test_comment_lists(self):
+        task = self.create_tasks(1)[0]
+        other = CustomUser.objects.create_user('other', email='other@example.com')
+        root = Comment.objects.create(task=task, user=self.user, content='root')
+        reply = Comment.objects.create(task=task, user=other, content='reply', parent=root)
+        Comment.objects.create(task=task, user=self.user, content='nested', parent=reply)
+        Comment.objects.create(task=task, user=other, content='second root')
+
+        comments = self.assertSameAsSerializers(f'/api/comments/?task={task.id}')
+        self.assertEqual(comments['results'][0]['replies'][0]['user']['email'], 'other@example.com')
+        self.assertSameAsSerializers(f'/api/comments/?task={task.id}&fields=id,replies')
+        self.assertSameAsSerializers(f'/api/comments/?task={task.id}&threaded=1')
+        self.assertSameAsSerializers(f'/api/comments/?task={task.id}&threaded=1&depth=1')
+
+    def test_activity_list(self):
+        task = self.create_tasks(1)[0]
+        ActivityLog.objects.create(user=self.user, task=task, project=self.project, action='created', description='x')
+        ActivityLog.objects.create(action='updated', description='system')
+        logs = self.assertSameAsSerializers('/api/activity-logs/')
+        self.assertEqual(logs['results'][1]['task'], task.title)
+        self.assertSameAsSerializers(f'/api/activity-logs/?task={task.id}&fields=user,timestamp')
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_renderer_matches_drf_encoder(self):
+        data = {
+            'when': now(), 'day': date(2024, 1, 2), 'amount': Decimal('1.50'), 'text': 'a b ü',
+            'lazy': gettext_lazy('Not found.'), 'nested': [{1: None, 'ok': True}], 'detail': ErrorDetail('bad'),
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render([2 ** 70]), JSONRenderer().render([2 ** 70]))
+
+
+@mock.patch('core.sqlite.time.sleep')
+class SQLiteWriteTests(APITestCase):
+
+    def flaky(self, *errors):
+        calls = mock.Mock(side_effect=[*errors, 'written'])
+
+        def save():
+            return calls()
+        return calls, write_transaction(save)
+
+    @mock.patch('core.sqlite.connections', {'default': mock.Mock(in_atomic_block=False)})
+    def test_locked_writes_are_retried(self, sleep):
+        calls, write = self.flaky(OperationalError('database is locked'), OperationalError('database is locked'))
+        self.assertEqual(write(), 'written')
+        self.assertEqual(calls.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+        calls, write = self.flaky(OperationalError('no such table: core_task'))
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(calls.call_count, 1)
+
+    @mock.patch('core.sqlite.connections', {'default': mock.Mock(in_atomic_block=False)})
+    def test_retried_task_updates_keep_assignees_and_labels(self, sleep):
+        user = CustomUser.objects.create_user('owner')
+        organization = Organization.objects.create(name='Acme')
+        project = Project.objects.create(name='Platform', organization=organization)
+        board = Board.objects.create(name='Sprint', project=project, organization=organization)
+        task = Task.objects.create(title='Task', column=Column.objects.create(name='To do', board=board))
+        label = Label.objects.create(name='bug', color='red')
+        save, attempts = Task.save, []
+
+        def locked_once(task, *args, **kwargs):
+            attempts.append(task)
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return save(task, *args, **kwargs)
+
+        serializer = TaskSerializer(task, data={'assignees': [user.id], 'labels': [label.id]}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with mock.patch.object(Task, 'save', autospec=True, side_effect=locked_once):
+            serializer.save()
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(list(task.assignees.all()), [user])
+        self.assertEqual(list(task.labels.all()), [label])
+
+    def test_no_retry_inside_outer_transaction(self, sleep):
+        calls, write = self.flaky(OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(calls.call_count, 1)
+        sleep.assert_not_called()
+
+
+class BenchmarkTests(APITestCase):
+
+    def test_generate_and_benchmark(self):
+        out = StringIO()
+        call_command(
+            'generate_synthetic_data', '--members', '4', '--projects', '1', '--boards', '2', '--tasks', '10',
+            '--activity', '2', '--prefix', 'bench', stdout=out,
+        )
+        org = Organization.objects.get(name='bench-0')
+        self.assertEqual(Task.objects.filter(organization=org).count(), 20)
+        self.assertTrue(Comment.objects.filter(organization=org, parent__isnull=False).exists())
+        self.assertEqual(Column.objects.filter(organization=org).exclude(project__organization=org).count(), 0)
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('run_benchmarks', '--iterations', '2', '--warmup', '0', '--output', output.name, stdout=out)
+            call_command(
+                'run_benchmarks', '--iterations', '1', '--warmup', '0', '--endpoint', 'search',
+                '--output', os.devnull, '--compare', output.name, stdout=out,
+            )
+            report = json.load(output)
+        self.assertEqual(report['meta']['organization'], org.id)
+        self.assertEqual(report['meta']['dataset']['tasks'], 20)
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['status'], [200], name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
@@ -2,6 +2,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import *
 from .analytics import *
+from .async_views import (
+    AsyncBoardSnapshotView, AsyncBurnDownChart, AsyncMemberProductivity, AsyncMissedDeadlines, AsyncTaskListView,
+    AsyncTasksCompletedPerDay,
+)
 
 router = DefaultRouter()
 router.register(r'organizations', OrganizationViewSet)
@@ -12,6 +16,8 @@ router.register(r'boards', BoardViewSet, basename='board')
 router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'columns', ColumnViewSet, basename='column')
 router.register(r'activity-logs', ActivityLogViewSet)
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'search', SearchViewSet, basename='search')
 
 
 
@@ -23,5 +29,13 @@ urlpatterns = [
     path("analytics/missed-deadlines/", MissedDeadlines.as_view(), name="missed_deadlines"),
     path("analytics/burndown-chart/", BurnDownChart.as_view(), name="burndown_chart"),
 
+    # Async versions of the read-heavy endpoints above, for ASGI deployments.
+    path('api/async/tasks/', AsyncTaskListView.as_view(), name='async_task_list'),
+    path('api/async/boards/<int:pk>/snapshot/', AsyncBoardSnapshotView.as_view(), name='async_board_snapshot'),
+    path("analytics/async/tasks-completed/", AsyncTasksCompletedPerDay.as_view(), name="async_tasks_completed"),
+    path("analytics/async/member-productivity/", AsyncMemberProductivity.as_view(), name="async_member_productivity"),
+    path("analytics/async/missed-deadlines/", AsyncMissedDeadlines.as_view(), name="async_missed_deadlines"),
+    path("analytics/async/burndown-chart/", AsyncBurnDownChart.as_view(), name="async_burndown_chart"),
+
 ]
 
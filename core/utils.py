@@ -1,28 +1,265 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from .activity import activity_log_buffer
 from .models import Membership, Organization
 
 from .models import ActivityLog
 
+
+class LRUCache:
+    """Small thread-safe, process-local LRU cache with a per-entry TTL."""
+
+    _missing = object()
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._missing)
+            if entry is self._missing:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Entries are (version, row) pairs, checked against the organization's shared
+# version on every read, so a change made through any worker is seen by all.
+_cache_options = getattr(settings, 'ACTIVE_ORG_CACHE', {})
+organization_cache = LRUCache(
+    maxsize=_cache_options.get('MAXSIZE', 256),
+    ttl=_cache_options.get('TTL', 60),
+)
+membership_cache = LRUCache(
+    maxsize=_cache_options.get('MAXSIZE', 256) * 4,
+    ttl=_cache_options.get('TTL', 60),
+)
+_NO_ROW = object()
+
+ROLE_CACHE_TIMEOUT = getattr(settings, 'ROLE_CACHE_TIMEOUT', 300)
+
+
 def log_activity(user, task, action, description):
-    ActivityLog.objects.create(
-        user=user,
-        task=task,
-        project=task.column.board.project,
+    activity_log_buffer.add(ActivityLog(
+        user_id=user.pk if user else None,
+        task_id=task.pk,
+        project_id=task.project_id,
         action=action,
-        description=description
-    )
+        description=description,
+        timestamp=now(),
+    ))
 
 def has_role(user, org, role):
+    return get_role(user, org) == role
+
+
+def _role_version_key(org_id):
+    return f'core:roles:version:{org_id}'
+
+
+def _new_role_version():
+    return time.time_ns()
+
+
+def bump_role_version(org_id):
+    # A fresh version makes every cached role, membership and organization row
+    # of the organization stale, in every process sharing the cache.
+    cache.set(_role_version_key(org_id), _new_role_version(), None)
+
+
+def _role_version(org_id):
+    return cache.get_or_set(_role_version_key(org_id), _new_role_version, None)
+
+
+async def _arole_version(org_id):
+    return await cache.aget_or_set(_role_version_key(org_id), _new_role_version, None)
+
+
+def _cached_row(lru, key, version):
+    # The version is read before the row, so a row cached under the current
+    # version cannot predate the last bump.
+    entry = lru.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    return _NO_ROW
+
+
+def _memoized_role(user, org, request):
+    """``(org_id, memo, role)`` with role _NO_ROW until looked up; org_id is None when there is no role."""
+    if user is None or not user.is_authenticated or org is None:
+        return None, None, None
+    org_id = getattr(org, 'pk', org)
     try:
-        membership = Membership.objects.get(user=user, organization=org)
-        return membership.role == role
-    except Membership.DoesNotExist:
-        return False
+        org_id = int(org_id)
+    except (TypeError, ValueError):
+        return None, None, None
+
+    memo = None
+    if request is not None:
+        store = _request_store(request)
+        memo = store.__dict__.setdefault('_roles', {})
+        if (user.id, org_id) in memo:
+            return org_id, memo, memo[(user.id, org_id)]
+        active = getattr(store, '_active_membership', None)
+        if active is not None and active[0] == user.id and active[1] is not None \
+                and active[1].organization_id == org_id:
+            memo[(user.id, org_id)] = active[1].role
+            return org_id, memo, active[1].role
+    return org_id, memo, _NO_ROW
+
+
+def _role_queryset(user, org_id):
+    return Membership.objects.filter(user_id=user.id, organization_id=org_id).values_list('role', flat=True)
+
+
+def get_role(user, org, request=None):
+    """Return the user's role in ``org`` (an Organization or its id), or None.
+
+    Roles are memoized per request when ``request`` is given, and across
+    requests in Django's cache under keys versioned per organization.
+    """
+    org_id, memo, role = _memoized_role(user, org, request)
+    if org_id is None or role is not _NO_ROW:
+        return role
+
+    version = _role_version(org_id)
+    key = f'core:role:{org_id}:{user.id}:{version}'
+    role = cache.get(key, _NO_ROW)
+    if role is _NO_ROW:
+        role = _role_queryset(user, org_id).first()
+        cache.set(key, role, ROLE_CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo[(user.id, org_id)] = role
+    return role
+
+
+async def aget_role(user, org, request=None):
+    """``get_role`` for async views."""
+    org_id, memo, role = _memoized_role(user, org, request)
+    if org_id is None or role is not _NO_ROW:
+        return role
+
+    version = await _arole_version(org_id)
+    key = f'core:role:{org_id}:{user.id}:{version}'
+    role = await cache.aget(key, _NO_ROW)
+    if role is _NO_ROW:
+        role = await _role_queryset(user, org_id).afirst()
+        await cache.aset(key, role, ROLE_CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo[(user.id, org_id)] = role
+    return role
+
+
+def get_organization(org_id):
+    version = _role_version(org_id)
+    org = _cached_row(organization_cache, org_id, version)
+    if org is _NO_ROW:
+        org = Organization.objects.filter(id=org_id).first()
+        organization_cache.set(org_id, (version, org))
+    return org
+
+
+def get_membership(user_id, org_id):
+    key = (user_id, org_id)
+    version = _role_version(org_id)
+    membership = _cached_row(membership_cache, key, version)
+    if membership is _NO_ROW:
+        membership = Membership.objects.filter(user_id=user_id, organization_id=org_id).first()
+        membership_cache.set(key, (version, membership))
+    return membership
+
+
+def _request_store(request):
+    # DRF wraps the Django request; memoize on the underlying one so the
+    # result is shared by middleware, views and permission classes alike.
+    return getattr(request, '_request', request)
+
 
 def get_active_organization(request):
+    store = _request_store(request)
+    if hasattr(store, '_active_org'):
+        return store._active_org
     org_id = request.session.get('active_org')
-    if not org_id:
-        return None
-    try:
-        return Organization.objects.get(id=org_id)
-    except Organization.DoesNotExist:
-        return None
+    org = get_organization(org_id) if org_id else None
+    store._active_org = org
+    return org
+
+
+def set_active_organization(request, org):
+    request.session['active_org'] = org.id
+    store = _request_store(request)
+    store._active_org = org
+    if hasattr(store, '_active_membership'):
+        del store._active_membership
+
+
+def get_active_membership(request):
+    store = _request_store(request)
+    user = request.user
+    user_id = user.id if user.is_authenticated else None
+    cached = getattr(store, '_active_membership', None)
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+    org = get_active_organization(request)
+    membership = None
+    if org is not None and user_id is not None:
+        membership = get_membership(user_id, org.id)
+    store._active_membership = (user_id, membership)
+    return membership
+
+
+# Async counterparts for views running on the event loop; they share the
+# process-local caches and per-request memo with the sync helpers above.
+
+async def aget_organization(org_id):
+    version = await _arole_version(org_id)
+    org = _cached_row(organization_cache, org_id, version)
+    if org is _NO_ROW:
+        org = await Organization.objects.filter(id=org_id).afirst()
+        organization_cache.set(org_id, (version, org))
+    return org
+
+
+async def aget_active_organization(request):
+    store = _request_store(request)
+    if hasattr(store, '_active_org'):
+        return store._active_org
+    org_id = await request.session.aget('active_org')
+    org = await aget_organization(org_id) if org_id else None
+    store._active_org = org
+    return org
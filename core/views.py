@@ -1,14 +1,29 @@
 from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from .models import *
 from .utils import *
 from .serializers import *
 from .permissions import IsMember
+from .pagination import *
+from .bulk import bulk_save_tasks
+from .export import *
+from .filters import filter_tasks
+from . import ordering
+from .search import get_search_backend
+from .sync import MAX_PAGE_SIZE, PAGE_SIZE, changes_since
+from .realtime import board_event, get_board_id, publish_board_events
+from .replicas import ReplicaReadMixin
+from .fast_serializers import ActivityLogFastSerializer, CommentFastSerializer, TaskFastSerializer
 from rest_framework.permissions import IsAuthenticated
-from django.utils.timezone import now
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware, now
 from datetime import timedelta
+from operator import attrgetter, itemgetter
 from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Count
 from django.shortcuts import render
 
@@ -23,15 +38,125 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+def get_sibling(siblings, pk, instance):
+    """The row ``after`` refers to in a move request, or None to move to the front."""
+    if pk is None:
+        return None
+    try:
+        return siblings.exclude(pk=instance.pk).get(pk=pk)
+    except (siblings.model.DoesNotExist, ValueError, TypeError):
+        raise serializers.ValidationError({'after': 'Must be the id of a sibling, or null to move to the front.'})
+
+
+def parse_since(value):
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ParseError('since must be an ISO 8601 datetime.')
+    return make_aware(since) if is_naive(since) else since
+
+
+def snapshot_tasks(tasks, since):
+    tasks = tasks.with_related().order_by('position', 'id')
+    return tasks.filter(updated_at__gt=since) if since else tasks
+
+
+def board_snapshot(board, columns, tasks, context, server_time, task_ids=None):
+    """Board snapshot payload; shared with the async snapshot view.
+
+    ``task_ids``, given for ``?since=`` polls, lists every task still on the
+    board so clients can drop the ones deleted or moved elsewhere.
+    """
+    tasks = list(tasks)
+    tasks_by_column = {}
+    # Grouped by the instances: ?fields= may leave 'column' out of the data.
+    for task, data in zip(tasks, TaskSerializer(tasks, many=True, context=context).data):
+        tasks_by_column.setdefault(task.column_id, []).append(data)
+    snapshot = {
+        'board': BoardSerializer(board, context=context).data,
+        'columns': [
+            {**ColumnSerializer(column, context=context).data, 'tasks': tasks_by_column.get(column.id, [])}
+            for column in columns
+        ],
+        'server_time': server_time,
+    }
+    if task_ids is not None:
+        snapshot['task_ids'] = task_ids
+    return snapshot
+
+
+class ActiveOrganizationMixin:
+    """Resolves the session's active organization and membership once per request."""
+
+    @property
+    def active_organization(self):
+        return get_active_organization(self.request)
+
+    @property
+    def active_membership(self):
+        return get_active_membership(self.request)
+
+
+class FastListMixin:
+    """Serves ``list`` from ``.values()`` rows through ``fast_serializer_class``, unless FAST_LIST_SERIALIZERS is off."""
+    fast_serializer_class = None
+
+    def use_fast_list(self):
+        return getattr(settings, 'FAST_LIST_SERIALIZERS', True)
+
+    def get_fast_serializer(self):
+        return self.fast_serializer_class(self.request)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+        fast = self.get_fast_serializer()
+        # The cursor is read off the last row, so the ordering columns must be fetched too.
+        ordering = [field.lstrip('-') for field in self.paginator.ordering] if self.paginator else []
+        rows = fast.values(self.filter_queryset(self.get_queryset()), *ordering)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(fast.serialize(rows))
+        return self.get_paginated_response(fast.serialize(page))
+
+
+class BoardBroadcastMixin:
+    """Publishes created/updated/deleted objects to the websocket group of their board."""
+    broadcast_kind = None
+
+    def broadcast(self, instance, action, data=None, board_id=None):
+        board_id = board_id or get_board_id(instance)
+        publish_board_events(board_id, [board_event(self.broadcast_kind, action, instance.pk, data)])
+
+    def perform_update(self, serializer):
+        old_board_id = get_board_id(serializer.instance)
+        super().perform_update(serializer)
+        board_id = get_board_id(serializer.instance)
+        if old_board_id != board_id:
+            publish_board_events(old_board_id, [board_event(self.broadcast_kind, 'deleted', serializer.instance.pk)])
+        self.broadcast(serializer.instance, 'updated', serializer.data, board_id)
+
+    def perform_destroy(self, instance):
+        board_id, pk = get_board_id(instance), instance.pk
+        super().perform_destroy(instance)
+        publish_board_events(board_id, [board_event(self.broadcast_kind, 'deleted', pk)])
+
+
 class OrganizationViewSet(viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {
+        'list': 2, 'retrieve': 2, 'my_organizations': 3, 'join_organization': 5, 'switch_organization': 6,
+        'create': 6, 'update': 2, 'partial_update': 2, 'destroy': 31,
+    }
+    pagination_class = CreatedAtCursorPagination
 
     def perform_create(self, serializer):
         org = serializer.save()
         Membership.objects.create(user=self.request.user, organization=org, role='admin')
-        self.request.session['active_org'] = org.id
+        set_active_organization(self.request, org)
 
     @action(detail=True, methods=['post'], url_path='join')
     def join_organization(self, request, pk=None):
@@ -53,18 +178,18 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     def switch_organization(self, request, pk=None):
         org = self.get_object()
 
-        if not Membership.objects.filter(user=request.user, organization=org).exists():
+        if get_membership(request.user.id, org.id) is None:
             return Response(
                 {'detail': 'You are not a member of this organization.'},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        request.session['active_org'] = org.id
+        set_active_organization(request, org)
         return Response({'status': 'switched', 'organization': org.name}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='my-organizations')
     def my_organizations(self, request):
-        memberships = Membership.objects.filter(user=request.user)
+        memberships = Membership.objects.filter(user=request.user).select_related('organization')
         data = [
             {
                 "id": m.organization.id,
@@ -80,71 +205,223 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         })
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ActiveOrganizationMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 4, 'retrieve': 4, 'create': 4, 'update': 5, 'partial_update': 4, 'destroy': 30}
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         return Project.objects.filter(organization=org)
 
     def perform_create(self, serializer):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         serializer.save(organization=org)
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+class BoardViewSet(ActiveOrganizationMixin, viewsets.ModelViewSet):
     queryset = Board.objects.all()
     serializer_class = BoardSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
+    query_budget = {'list': 4, 'retrieve': 5, 'snapshot': 9, 'create': 4, 'update': 6, 'partial_update': 5, 'destroy': 25}
 
     def get_queryset(self):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         return Board.objects.filter(project__organization=org)
 
     def perform_create(self, serializer):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         project = serializer.validated_data.get('project')
-        if project.organization != org:
+        if org is None or project.organization_id != org.id:
             raise serializers.ValidationError("Project does not belong to the active organization.")
-        serializer.save()
-
+        serializer.save(organization=org)
 
-class ColumnViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def snapshot(self, request, pk=None):
+        """The board, its ordered columns and their tasks in a fixed number of queries.
+
+        ``?since=<ISO datetime>`` limits tasks to those updated after that time;
+        pass the previous response's ``server_time`` to poll for changes. Such a
+        response is not a full delta on its own: deleted tasks and tasks moved
+        to another board are absent, so it also carries ``task_ids``, the ids of
+        every task on the board, and clients drop any task not listed there.
+        """
+        server_time = now()
+        board = self.get_object()
+        since = parse_since(request.query_params.get('since'))
+        columns = list(board.columns.order_by('order', 'id'))
+        tasks = Task.objects.filter(column__in=[column.id for column in columns])
+        task_ids = list(tasks.values_list('id', flat=True)) if since else None
+        tasks = snapshot_tasks(tasks, since)
+        return Response(board_snapshot(board, columns, tasks, self.get_serializer_context(), server_time, task_ids))
+
+
+class ColumnViewSet(ActiveOrganizationMixin, BoardBroadcastMixin, viewsets.ModelViewSet):
     queryset = Column.objects.all()
     serializer_class = ColumnSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
+    query_budget = {
+        'list': 4, 'retrieve': 5, 'move': 11, 'reorder': 6,
+        'create': 8, 'update': 13, 'partial_update': 13, 'destroy': 23,
+    }
+    pagination_class = ColumnOrderCursorPagination
+    broadcast_kind = 'column'
 
     def get_queryset(self):
-        org = get_active_organization(self.request)
-        return Column.objects.filter(board__project__organization=org)
+        org = self.active_organization
+        columns = Column.objects.filter(organization=org)
+        board = self.request.query_params.get('board')
+        if board:
+            if not board.isdigit():
+                raise serializers.ValidationError({'board': 'Must be a board id.'})
+            columns = columns.filter(board_id=board)
+        return columns
 
     def perform_create(self, serializer):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         board = serializer.validated_data.get('board')
-        if board.project.organization != org:
+        if org is None or board.organization_id != org.id:
             raise serializers.ValidationError("Board does not belong to the active organization.")
-        serializer.save()
+        with transaction.atomic():
+            order = ordering.place(Column(board=board), board.columns, 'order', serializer.validated_data.get('order'))
+            column = serializer.save(order=order)
+        self.broadcast(column, 'created', serializer.data)
+
+    def perform_update(self, serializer):
+        column, data = serializer.instance, serializer.validated_data
+        board_id = data['board'].id if 'board' in data else column.board_id
+        with transaction.atomic():
+            if 'order' in data or board_id != column.board_id:
+                # A written order only says where the column sorts; ranks stay gapped.
+                data['order'] = ordering.place(column, Column.objects.filter(board_id=board_id), 'order', data.get('order'))
+            super().perform_update(serializer)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Place the column after the sibling ``after`` (null for first), writing only this column."""
+        if 'after' not in request.data:
+            raise serializers.ValidationError({'after': 'This field is required.'})
+        with transaction.atomic():
+            column = self.get_object()
+            siblings = Column.objects.filter(board_id=column.board_id)
+            after = get_sibling(siblings, request.data['after'], column)
+            ordering.move(column, siblings, 'order', after)
+            column.save(update_fields=['order', 'updated_at'])
+        data = self.get_serializer(column).data
+        self.broadcast(column, 'updated', data)
+        return Response(data)
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        """Set a board's whole column order from ``{"board": id, "columns": [ids]}`` in one bulk update."""
+        if self.active_membership is None:
+            return Response({'detail': 'No active organization.'}, status=status.HTTP_403_FORBIDDEN)
+        board_id, ids = request.data.get('board'), request.data.get('columns')
+        if not isinstance(board_id, int) or not isinstance(ids, list):
+            raise serializers.ValidationError('Expected {"board": <id>, "columns": [<ids>]}.')
+        with transaction.atomic():
+            columns = Column.objects.filter(organization=self.active_organization, board_id=board_id).in_bulk()
+            if not columns or len(ids) != len(columns) or set(ids) != set(columns):
+                raise serializers.ValidationError({'columns': 'Must list every column of the board exactly once.'})
+            rows = ordering.respace([columns[pk] for pk in ids], 'order')
+        data = self.get_serializer(rows, many=True).data
+        publish_board_events(board_id, [board_event('column', 'updated', item['id'], item) for item in data])
+        return Response(data)
 
 
 User = get_user_model()
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(FastListMixin, ActiveOrganizationMixin, BoardBroadcastMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    fast_serializer_class = TaskFastSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
+    query_budget = {
+        'list': 6, 'retrieve': 7, 'export': 3, 'bulk': 31, 'move': 13,
+        'create': 28, 'update': 32, 'partial_update': 15, 'destroy': 22, 'assign_member': 16,
+    }
+    pagination_class = CreatedAtCursorPagination
+    broadcast_kind = 'task'
 
     def get_queryset(self):
-        org = get_active_organization(self.request)
-        return Task.objects.filter(column__board__project__organization=org)
+        org = self.active_organization
+        tasks = Task.objects.for_organization(org).with_related()
+        if self.action in ('list', 'export'):
+            tasks = filter_tasks(tasks, self.request.query_params, self.request)
+        return tasks
 
     def perform_create(self, serializer):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         column = serializer.validated_data.get('column')
-        if column.board.project.organization != org:
+        if org is None or column.organization_id != org.id:
             raise serializers.ValidationError("Column does not belong to the active organization.")
-        serializer.save()
+        task = serializer.save(position=ordering.next_rank(column.tasks, 'position'))
+        self.broadcast(task, 'created', serializer.data, column.board_id)
+
+    def perform_update(self, serializer):
+        column = serializer.validated_data.get('column')
+        if column is not None and column.id != serializer.instance.column_id:
+            # A task moved by an edit joins the end of its new column.
+            serializer.validated_data['position'] = ordering.next_rank(column.tasks, 'position')
+        super().perform_update(serializer)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Place the task after the task ``after`` (null for first) in ``column``, default its own.
+
+        Only the moved task is written, unless its new neighbours have to be respaced.
+        """
+        if 'after' not in request.data:
+            raise serializers.ValidationError({'after': 'This field is required.'})
+        task = self.get_object()
+        old_board_id = get_board_id(task)
+        if 'column' in request.data:
+            try:
+                task.column = Column.objects.get(organization=self.active_organization, pk=request.data['column'])
+            except (Column.DoesNotExist, ValueError, TypeError):
+                raise serializers.ValidationError({'column': 'Column does not belong to the active organization.'})
+        with transaction.atomic():
+            siblings = Task.objects.filter(column_id=task.column_id)
+            after = get_sibling(siblings, request.data['after'], task)
+            ordering.move(task, siblings, 'position', after)
+            task.save(update_fields=['column', 'position', 'updated_at'])
+
+        data = self.get_serializer(task).data
+        board_id = task.column.board_id
+        if old_board_id != board_id:
+            publish_board_events(old_board_id, [board_event('task', 'deleted', task.pk)])
+        self.broadcast(task, 'updated', data, board_id)
+        return Response(data)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        org = self.active_organization
+        if org is None:
+            return Response({'detail': 'No active organization.'}, status=status.HTTP_400_BAD_REQUEST)
+        payload = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+        saved = bulk_save_tasks(payload, org)
+        tasks = Task.objects.filter(id__in=[pk for pk, _, _ in saved]).with_related().in_bulk()
+        serializer = self.get_serializer([tasks[pk] for pk, _, _ in saved], many=True)
+
+        events = {}
+        for (pk, board_id, previous_board_id), data in zip(saved, serializer.data):
+            if previous_board_id is None:
+                events.setdefault(board_id, []).append(board_event('task', 'created', pk, data))
+                continue
+            if previous_board_id != board_id:
+                events.setdefault(previous_board_id, []).append(board_event('task', 'deleted', pk))
+            events.setdefault(board_id, []).append(board_event('task', 'updated', pk, data))
+        for board_id, board_events in events.items():
+            publish_board_events(board_id, board_events)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the active organization's tasks as ``?file_format=csv`` or ``ndjson``."""
+        file_format = export_format(request)
+        return streaming_export('tasks', TASK_EXPORT_FIELDS, task_rows(self.get_queryset()), file_format)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def assign_member(self, request, pk=None):
@@ -153,7 +430,8 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         try:
             user_to_assign = User.objects.get(pk=user_id)
-            task.assignees.add(user_to_assign) 
+            task.assignees.add(user_to_assign)
+            self.broadcast(task, 'updated', self.get_serializer(task).data)
 
             log_activity(
                 user=request.user,
@@ -166,30 +444,94 @@ class TaskViewSet(viewsets.ModelViewSet):
             return Response({"error": "User not found."}, status=404)
 
 
-class LabelViewSet(viewsets.ModelViewSet):
+class LabelViewSet(ActiveOrganizationMixin, viewsets.ModelViewSet):
     queryset = Label.objects.all()
     serializer_class = LabelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 3, 'update': 4, 'partial_update': 4, 'destroy': 5}
 
     def get_queryset(self):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         return Label.objects.filter(organization=org)
 
     def perform_create(self, serializer):
-        org = get_active_organization(self.request)
+        org = self.active_organization
         serializer.save(organization=org)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+COMMENT_THREAD_MAX_DEPTH = 50
+
+
+def split_thread(comments, parent_of):
+    """Root comments, and the rest grouped by parent id."""
+    roots, children = [], {}
+    for comment in comments:
+        parent_id = parent_of(comment)
+        if parent_id is None:
+            roots.append(comment)
+        else:
+            children.setdefault(parent_id, []).append(comment)
+    return roots, children
+
+
+class CommentViewSet(FastListMixin, BoardBroadcastMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    fast_serializer_class = CommentFastSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 6, 'update': 8, 'partial_update': 7, 'destroy': 6}
+    pagination_class = CommentCursorPagination
+    broadcast_kind = 'comment'
 
     def get_queryset(self):
-        return Comment.objects.filter(task__id=self.request.query_params.get('task'))
+        return Comment.objects.filter(task__id=self.request.query_params.get('task')).select_related('user')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        task_id = self.request.query_params.get('task')
+        threaded = self.request.query_params.get('threaded') in ('1', 'true')
+        if self.request.method == 'GET' and task_id and task_id.isdigit() and not threaded:
+            # Nested replies from one query for the task instead of one per comment.
+            replies = Comment.objects.filter(task_id=task_id, parent__isnull=False).select_related('user')
+            children = split_thread(replies, attrgetter('parent_id'))[1]
+            context.update(comment_children=children, comment_max_depth=COMMENT_THREAD_MAX_DEPTH)
+        return context
+
+    def use_fast_list(self):
+        # Replies are nested from the task's comments, fetched up front.
+        task_id = self.request.query_params.get('task')
+        return super().use_fast_list() and bool(task_id) and task_id.isdigit()
+
+    def get_fast_serializer(self):
+        fast = CommentFastSerializer(self.request, max_depth=COMMENT_THREAD_MAX_DEPTH)
+        replies = Comment.objects.filter(task_id=self.request.query_params['task'], parent__isnull=False)
+        fast.children = split_thread(fast.values(replies), itemgetter('parent'))[1]
+        return fast
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('threaded') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        max_depth = request.query_params.get('depth', COMMENT_THREAD_MAX_DEPTH)
+        try:
+            max_depth = min(int(max_depth), COMMENT_THREAD_MAX_DEPTH)
+        except ValueError:
+            return Response({'detail': 'depth must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One query for the whole thread, then a single pass to link replies to parents.
+        if self.use_fast_list():
+            fast = CommentFastSerializer(request, max_depth=max_depth)
+            roots, fast.children = split_thread(fast.values(self.get_queryset()), itemgetter('parent'))
+            return Response(fast.serialize(roots))
+
+        roots, children = split_thread(self.get_queryset(), attrgetter('parent_id'))
+        context = {**self.get_serializer_context(), 'comment_children': children, 'comment_max_depth': max_depth}
+        serializer = CommentSerializer(roots, many=True, context=context)
+        return Response(serializer.data)
 
     def perform_create(self, serializer):
         comment = serializer.save(user=self.request.user)
+        self.broadcast(comment, 'created', serializer.data)
         log_activity(
             user=self.request.user,
             task=comment.task,
@@ -198,13 +540,71 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
 
 
-class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class SyncViewSet(ActiveOrganizationMixin, viewsets.ViewSet):
+    """Change feed of the active organization's tasks, columns and comments.
+
+    Call without ``token`` for a full sync, then pass back the returned token
+    to receive only what changed (and what was deleted) since.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 10}
+
+    def list(self, request):
+        org = self.active_organization
+        if org is None or self.active_membership is None:
+            return Response({'detail': 'No active organization.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            limit = min(int(request.query_params.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'detail': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+        changes = changes_since(org, request.query_params.get('token'), limit, {'request': request})
+        return Response(changes)
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_OFFSET = 1000
+
+
+class SearchViewSet(ActiveOrganizationMixin, viewsets.ViewSet):
+    """Ranked full-text search over the active organization's tasks and comments.
+
+    ``?q=`` is the query; page with ``limit`` and the returned ``next_offset``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 5}
+
+    def list(self, request):
+        org = self.active_organization
+        if org is None or self.active_membership is None:
+            return Response({'detail': 'No active organization.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_PAGE_SIZE)), 100)
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({'detail': 'limit and offset must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or not 0 <= offset <= SEARCH_MAX_OFFSET:
+            return Response({'detail': 'limit or offset out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One extra hit tells whether there is a next page without counting.
+        hits = get_search_backend().search(org.id, request.query_params.get('q', ''), limit + 1, offset)
+        return Response({
+            'results': hits[:limit],
+            'next_offset': offset + limit if len(hits) > limit else None,
+        })
+
+
+class ActivityLogViewSet(FastListMixin, ReplicaReadMixin, ActiveOrganizationMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ActivityLog.objects.all()
     serializer_class = ActivityLogSerializer
+    fast_serializer_class = ActivityLogFastSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2, 'export': 4}
+    pagination_class = TimestampCursorPagination
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = super().get_queryset().select_related('user', 'task', 'project')
 
         project = self.request.query_params.get('project')
         user = self.request.query_params.get('user')
@@ -219,5 +619,15 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
             filters['task__id'] = task
         return qs.filter(**filters)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the active organization's activity, filtered like the list, for admins and managers."""
+        org = self.active_organization
+        if get_role(request.user, org, request) not in ('admin', 'manager'):
+            return Response({'detail': 'Only admins and managers can export activity.'}, status=status.HTTP_403_FORBIDDEN)
+        file_format = export_format(request)
+        logs = self.get_queryset().filter(project__organization_id=org.id)
+        return streaming_export('activity', ACTIVITY_EXPORT_FIELDS, activity_rows(logs), file_format)
+
 
 
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path, os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -60,9 +62,20 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '1000/day',
-    }
+    },
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.IdCursorPagination',
+    'PAGE_SIZE': 50,
+    # orjson when installed, DRF's encoder otherwise.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Task, comment and activity lists serialize .values() rows through
+# core.fast_serializers instead of DRF fields; FAST_LIST_SERIALIZERS=0 turns it off.
+FAST_LIST_SERIALIZERS = os.environ.get('FAST_LIST_SERIALIZERS', '1') == '1'
+
 
 
 
@@ -76,7 +89,19 @@ SIMPLE_JWT = {
 # Channels configuration
 ASGI_APPLICATION = 'project_manager.asgi.application'
 
+# In-memory layer for local use; switch to channels_redis when running more than one process.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+# Seconds during which board events are coalesced into one websocket frame.
+BOARD_BROADCAST_WINDOW = 0.05
+
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
+    'core.replicas.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -113,13 +138,138 @@ WSGI_APPLICATION = 'project_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# DATABASE_PROFILE picks the backend:
+#   sqlite          one local file (default)
+#   sqlite-replica  adds a "replica" alias on DATABASE_REPLICA_NAME (default: the
+#                   same file) to exercise replica routing locally
+#   postgres        DATABASE_* environment variables (needs psycopg);
+#                   DATABASE_REPLICA_HOST adds a replica and DATABASE_POOL=1 swaps
+#                   persistent connections for a psycopg pool
+# Reads of the views using core.replicas.ReplicaReadMixin go to "replica" when it
+# exists, except for clients that wrote in the last DATABASE_REPLICA_PIN_SECONDS.
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+# Reuse connections across requests; health checks replace dead ones before use.
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', 60))
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 5))
+
+# SQLite performance mode, on unless DATABASE_SQLITE_TUNED=0. WAL lets readers
+# run next to the single writer, IMMEDIATE transactions take the write lock at
+# BEGIN so busy_timeout queues writers instead of failing them halfway, and
+# core.sqlite.write_transaction retries whatever still times out.
+SQLITE_TUNED = os.environ.get('DATABASE_SQLITE_TUNED', '1') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB
+    'busy_timeout': 5000,  # ms
+}
+SQLITE_OPTIONS = {
+    'init_command': '; '.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+}
+SQLITE_WRITE_RETRIES = {
+    'ATTEMPTS': 5,
+    'BACKOFF': 0.05,  # seconds, doubled per attempt
+}
+
+if DATABASE_PROFILE in ('sqlite', 'sqlite-replica'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': SQLITE_OPTIONS if SQLITE_TUNED else {},
+        }
+    }
+    if DATABASE_PROFILE == 'sqlite-replica':
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.environ.get('DATABASE_REPLICA_NAME', DATABASES['default']['NAME']),
+            'TEST': {'MIRROR': 'default'},
+        }
+elif DATABASE_PROFILE == 'postgres':
+    def postgres_database(host):
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': host,
+            'PORT': os.environ.get('DATABASE_PORT', '5432'),
+            'NAME': os.environ.get('DATABASE_NAME', 'project_manager'),
+            'USER': os.environ.get('DATABASE_USER', 'project_manager'),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+        if os.environ.get('DATABASE_POOL') == '1':
+            # Django's pool needs psycopg 3 and does not combine with persistent connections.
+            database['CONN_MAX_AGE'] = 0
+            database['OPTIONS'] = {'pool': {
+                'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+                'timeout': 10,
+            }}
+        return database
+
+    DATABASES = {'default': postgres_database(os.environ.get('DATABASE_HOST', 'localhost'))}
+    if os.environ.get('DATABASE_REPLICA_HOST'):
+        DATABASES['replica'] = {**postgres_database(os.environ['DATABASE_REPLICA_HOST']), 'TEST': {'MIRROR': 'default'}}
+else:
+    raise ImproperlyConfigured(f'Unknown DATABASE_PROFILE "{DATABASE_PROFILE}".')
+
+DATABASE_ROUTERS = ['core.replicas.PrimaryReplicaRouter']
+
+
+# Cache
+# Role lookups (core.utils.get_role) are shared across requests through this
+# cache, and the per-process organization and membership caches are checked
+# against the versions kept in it; point it at Redis or Memcached so every
+# worker sees the same entries and invalidations.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+ROLE_CACHE_TIMEOUT = 300
+ANALYTICS_CACHE_TIMEOUT = 300
+
+# Search (core.search)
+# Unset, SQLite uses the FTS5 table of migration 0012: indexed, bm25-ranked.
+# Every other database, postgres included, falls back to DatabaseSearchBackend:
+# unindexed icontains scans, every hit ranked 0.0 and ordered by updated_at.
+# Point this at a SearchBackend subclass to plug in an indexed one.
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or None
+
+# Buffered audit logging (core.activity)
+ACTIVITY_LOG = {
+    'BUFFERED': True,
+    'MAX_BATCH': 100,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    # Raise instead of logging when a view runs more queries than its query_budget.
+    # The test runner turns this on for the whole suite.
+    'ENFORCE_BUDGETS': False,
+    # /metrics/ is served to staff users and to requests sending
+    # "Authorization: Bearer <token>"; unset, only staff can scrape.
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+SYNC = {
+    'PAGE_SIZE': 200,
+    'MAX_PAGE_SIZE': 1000,
+    'SETTLE_SECONDS': 2,
+    'TOMBSTONE_RETENTION_DAYS': 30,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
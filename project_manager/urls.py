@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('core.urls')),  # your app routes
@@ -24,6 +26,7 @@ urlpatterns = [
     path('auth/', include('djoser.urls.jwt')),
     path('',include('core.urls')),
     path('analytics/', include('analytics.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 
 
     